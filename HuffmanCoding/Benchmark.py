@@ -0,0 +1,200 @@
+"""
+Huffman compression/decompression benchmark script
+
+Generates synthetic corpora, compresses and decompresses each of them,
+    and writes throughput, peak memory, ratio and per-phase timings as JSON,
+    such that runs can be compared across commits.
+Every case runs in its own process, so peak RSS is measured per case.
+
+Authors:
+    - Kian Banke Larsen (kilar20)
+    - Silas Pockendahl (silch20)
+"""
+
+from Huffman import Huffman, HuffmanStats
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+SIZES = (1 << 10, 1 << 20, 1 << 24) # default corpus sizes, from 1 KB
+MAX_SIZE = 1 << 30 # largest size accepted, 1 GB
+BASE_SIZE = 1 << 20 # bytes generated, larger corpora repeat them
+
+# Keyword arguments of `Huffman.compress` for each mode
+MODES = {
+    "canonical": {},
+    "blocks": {"block_size": Huffman.BLOCK_SIZE},
+    "context": {"context": True},
+    "legacy": {"legacy": True},
+}
+
+WORDS = (
+    "the of and to in a is that for it as was with be by on not he this are or his "
+    "from at which but have an they you were her she there been one all we their "
+    "has would when if so no will more some time could them into only other new "
+    "what about than these two may first then do any like my now over such our man "
+    "me even most made after also did many before must through back years where much"
+).split()
+
+def _uniform(rng):
+    return rng.randbytes(BASE_SIZE)
+
+def _zipf(rng):
+    # Byte k is drawn with weight 1 / (k + 1)
+    weights = [1 / (k + 1) for k in range(256)]
+    return bytes(rng.choices(range(256), weights, k=BASE_SIZE))
+
+def _text(rng):
+    # Words drawn with Zipf weights, sentences of 5 to 20 words
+    weights = [1 / (k + 1) for k in range(len(WORDS))]
+    sentences = []
+    length = 0
+    while length < BASE_SIZE:
+        words = rng.choices(WORDS, weights, k=rng.randint(5, 20))
+        sentence = " ".join(words).capitalize() + (".\n" if rng.random() < 0.2 else ". ")
+        sentences.append(sentence)
+        length += len(sentence)
+    return "".join(sentences).encode()[:BASE_SIZE]
+
+def _single(rng):
+    return b"a" * BASE_SIZE
+
+# Generators of `BASE_SIZE` bytes for each corpus
+CORPORA = {
+    "uniform": _uniform,
+    "zipf": _zipf,
+    "text": _text,
+    "single": _single,
+    "empty": None,
+}
+
+def writeCorpus(corpus, size, path, seed=0):
+    """
+    Writes `size` bytes of `corpus` to `path`.
+    The base data is repeated, which does not change byte frequencies.
+    """
+    with open(path, "wb") as output:
+        if CORPORA[corpus] is None:
+            return
+        base = CORPORA[corpus](random.Random(seed))
+        for offset in range(0, size, len(base)):
+            output.write(base[:size - offset])
+
+def peakRSS():
+    """
+    Returns the peak resident set size in KB of this process, or of its
+        finished children if larger, such as the workers of `Huffman._executor`.
+    """
+    rss = max(resource.getrusage(who).ru_maxrss for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+    return rss // 1024 if sys.platform == "darwin" else rss # bytes on macOS
+
+def _timed(function, *args, **kwargs):
+    t = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - t
+
+def runCase(path, mode):
+    """
+    Benchmarks `mode` on the corpus in `path`, in the current process.
+    Returns a dictionary of measurements, times are in seconds.
+    Phases are measured by `HuffmanStats`, see its phases.
+    """
+    size = os.path.getsize(path)
+    compress_stats = HuffmanStats()
+    decompress_stats = HuffmanStats()
+
+    with tempfile.TemporaryDirectory() as directory:
+        compressed = os.path.join(directory, "compressed")
+        decompressed = os.path.join(directory, "decompressed")
+        (_, output_size), compress_time = _timed(Huffman.compress, path, compressed,
+                                                 stats=compress_stats, **MODES[mode])
+        _, decompress_time = _timed(Huffman.decompress, compressed, decompressed, stats=decompress_stats)
+        if os.path.getsize(decompressed) != size:
+            raise Exception("Decompressed size differs from input size")
+
+    mb = size / 1e6
+    return {
+        "input_size": size,
+        "output_size": output_size,
+        "ratio": output_size / size if size else None,
+        "compress_time": compress_time,
+        "decompress_time": decompress_time,
+        "compress_mbps": mb / compress_time,
+        "decompress_mbps": mb / decompress_time,
+        "compress_phases": compress_stats.asDict(),
+        "decompress_phases": decompress_stats.asDict(),
+        "peak_rss_kb": peakRSS(),
+    }
+
+def _parseSize(text):
+    # Sizes like 1024, 1K, 16M or 1G
+    units = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+    if text[-1:].upper() in units:
+        size = int(text[:-1]) * units[text[-1].upper()]
+    else:
+        size = int(text)
+    if not 0 <= size <= MAX_SIZE:
+        raise argparse.ArgumentTypeError(f"size must be between 0 and {MAX_SIZE}")
+    return size
+
+def _commit():
+    # The commit of the working tree, if any
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def main(args):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for corpus in args.corpora:
+            # The empty corpus only has one size
+            for size in (0,) if CORPORA[corpus] is None else args.sizes:
+                path = os.path.join(directory, f"{corpus}-{size}")
+                writeCorpus(corpus, size, path, args.seed)
+                for mode in args.modes:
+                    print(f"Benchmarking {corpus:>8} {size:>11} bytes, {mode}...", file=sys.stderr)
+                    # A new process for every case, for a fair peak RSS
+                    child = subprocess.run([sys.executable, os.path.abspath(__file__), "--case", path, mode],
+                                           capture_output=True, text=True)
+                    if child.returncode != 0:
+                        print(child.stderr, file=sys.stderr)
+                        raise Exception(f"Benchmark of {corpus} ({size} bytes, {mode}) failed")
+                    results.append({"corpus": corpus, "size": size, "mode": mode, **json.loads(child.stdout)})
+                os.remove(path)
+
+    report = {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--case":
+        # Child process of `main`, runs a single case
+        print(json.dumps(runCase(sys.argv[2], sys.argv[3])))
+    else:
+        parser = argparse.ArgumentParser(description="Benchmark Huffman compression on synthetic corpora.")
+        parser.add_argument("output", nargs="?", help="JSON file to write, standard output if left out")
+        parser.add_argument("--sizes", nargs="+", type=_parseSize, default=SIZES,
+                            help="corpus sizes, like 1K, 16M or 1G (default: 1K 1M 16M)")
+        parser.add_argument("--corpora", nargs="+", choices=CORPORA, default=list(CORPORA))
+        parser.add_argument("--modes", nargs="+", choices=MODES, default=["canonical"])
+        parser.add_argument("--seed", type=int, default=0)
+        main(parser.parse_args())
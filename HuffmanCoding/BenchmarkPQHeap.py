@@ -0,0 +1,110 @@
+"""
+Priority queue benchmark script
+
+Compares the kinds of `PQHeap` (and the `fast` binary heap) on workloads
+    with different ratios of insert, extractMin and decreaseKey,
+    printing the seconds of each, and optionally writing them as JSON.
+
+Authors:
+    - Kian Banke Larsen (kilar20)
+    - Silas Pockendahl (silch20)
+"""
+
+from Element import Element
+from PQHeap import PQHeap
+import argparse
+import json
+import random
+import sys
+import time
+
+# Keyword arguments of `PQHeap` for each heap compared
+HEAPS = {
+    "binary": {"kind": "binary"},
+    "fast": {"kind": "binary", "fast": True},
+    "4ary": {"kind": "4ary"},
+    "pairing": {"kind": "pairing"},
+}
+
+def sort(n, rng, **kwargs):
+    # n inserts, then n extractMins (heap sort)
+    q = PQHeap(**kwargs)
+    for i in range(n):
+        q.insert(Element(rng.random(), i))
+    for i in range(n):
+        q.extractMin()
+
+def heapify(n, rng, **kwargs):
+    # n keys at once, then n extractMins
+    q = PQHeap([Element(rng.random(), i) for i in range(n)], **kwargs)
+    for i in range(n):
+        q.extractMin()
+
+def inserts(n, rng, **kwargs):
+    # 10 inserts per extractMin, like a growing queue
+    q = PQHeap(**kwargs)
+    for i in range(n):
+        q.insert(Element(rng.random(), i))
+        if i % 10 == 0:
+            q.extractMin()
+
+def steady(n, rng, **kwargs):
+    # A queue of n / 10 keys, where each new key replaces the minimum,
+    #   like a scheduler of periodic tasks
+    q = PQHeap([Element(rng.random(), i) for i in range(n // 10 + 1)], **kwargs)
+    for i in range(n):
+        q.pushpop(Element(q.peek().key + rng.random(), i))
+
+def dijkstra(n, rng, **kwargs):
+    # Shortest paths from node 0 of a random graph of n nodes and 4n edges,
+    #   with a decreaseKey for every shorter path found
+    edges = [[] for _ in range(n)]
+    for _ in range(4 * n):
+        edges[rng.randrange(n)].append((rng.randrange(n), rng.random()))
+    q = PQHeap([Element(0 if v == 0 else float("inf"), v) for v in range(n)], indexed=True, **kwargs)
+    while len(q):
+        u = q.extractMin()
+        for v, w in edges[u.data]:
+            if v in q and u.key + w < q.find(v).key:
+                q.decreaseKey(v, u.key + w)
+
+# Workloads, each called with n, a random generator, and `PQHeap` arguments
+WORKLOADS = {
+    "sort": sort,
+    "heapify": heapify,
+    "inserts": inserts,
+    "steady": steady,
+    "dijkstra": dijkstra,
+}
+
+def run(workload, heap, n, seed=0):
+    """
+    Returns the seconds `workload` takes with `heap`, for n keys,
+        or None if the heap can not run it (a fast heap is not indexed).
+    """
+    if workload == "dijkstra" and HEAPS[heap].get("fast"):
+        return None
+    t = time.perf_counter()
+    WORKLOADS[workload](n, random.Random(seed), **HEAPS[heap])
+    return time.perf_counter() - t
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the kinds of PQHeap.")
+    parser.add_argument("output", nargs="?", help="JSON file to write the results to")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[10000, 100000])
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--heaps", nargs="+", choices=HEAPS, default=list(HEAPS))
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'workload':>10} {'n':>9}" + "".join(f"{heap:>10}" for heap in args.heaps))
+    for workload in args.workloads:
+        for n in args.sizes:
+            times = {heap: run(workload, heap, n) for heap in args.heaps}
+            results += [{"workload": workload, "n": n, "heap": heap, "seconds": t} for heap, t in times.items()]
+            print(f"{workload:>10} {n:>9}" + "".join(f"{'-' if t is None else f'{t:.3f}':>10}" for t in times.values()))
+            sys.stdout.flush()
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
@@ -0,0 +1,127 @@
+"""
+Huffman decoder check script
+
+Compresses small corpora in every format, and checks that decoding them
+    with a lookup table of each size (`table_bits` 1 to 12) gives the input,
+    just like the tree decoder (`table_bits` 0) does, through files
+    (`Huffman.decompress`), bytes (`decompressBytes`) and chunks
+    (`decompressStream`).
+Prints each case that fails, and exits with status 1 if any did.
+
+Authors:
+    - Kian Banke Larsen (kilar20)
+    - Silas Pockendahl (silch20)
+"""
+
+from Huffman import Huffman
+import argparse
+import os
+import random
+import sys
+import tempfile
+
+SIZES = (0, 1, 2, 7, 8, 9, 57, 64, 121, 2000) # corpus sizes, around whole words
+TABLE_BITS = range(1, 13) # table sizes compared with the tree decoder
+DICTIONARY = 1 << 30 # ID of the dictionary registered by `main`
+
+def _two(rng, size):
+    # Two bytes, whose codes are 1 bit long
+    return bytes(rng.choices(b"ab", k=size))
+
+def _skewed(rng, size):
+    # A few bytes, with codes from 1 bit long
+    return bytes(rng.choices(b"abcdefgh", [64, 32, 16, 8, 4, 2, 1, 1], k=size))
+
+def _zipf(rng, size):
+    # Byte k is drawn with weight 1 / (k + 1), with long codes
+    return bytes(rng.choices(range(256), [1 / (k + 1) for k in range(256)], k=size))
+
+def _uniform(rng, size):
+    return rng.randbytes(size)
+
+CORPORA = {
+    "two": _two,
+    "skewed": _skewed,
+    "zipf": _zipf,
+    "uniform": _uniform,
+}
+
+def _compressFile(path, output, **kwargs):
+    Huffman.compress(path, output, **kwargs)
+    with open(output, "rb") as compressed:
+        return compressed.read()
+
+def _stream(path, output):
+    # Streamed format, with a model of the bytes in the file, so two
+    #   bytes have codes short enough to decode padding as symbols
+    with open(path, "rb") as input_file:
+        data = input_file.read()
+    freqs = [data.count(byte) for byte in range(256)]
+    return b"".join(Huffman.compressStream([data], freqs=freqs))
+
+# Ways of compressing a file to bytes, given its path and a path to use
+FORMATS = {
+    "canonical": lambda path, output: _compressFile(path, output),
+    "legacy": lambda path, output: _compressFile(path, output, legacy=True),
+    "blocks": lambda path, output: _compressFile(path, output, block_size=100, workers=1),
+    "context": lambda path, output: _compressFile(path, output, context=True),
+    "dictionary": lambda path, output: _compressFile(path, output, dictionary=DICTIONARY),
+    "streamed": _stream,
+}
+
+def check(data, compressed, directory):
+    """
+    Returns a list of the ways of decoding `compressed` that do not give
+        `data`, starting with the tree decoder.
+    """
+    path = os.path.join(directory, "compressed")
+    output = os.path.join(directory, "decompressed")
+    with open(path, "wb") as compressed_file:
+        compressed_file.write(compressed)
+
+    failed = []
+    for table_bits in (0, *TABLE_BITS):
+        ways = {"decompress": lambda: _decompressFile(path, output, table_bits)}
+        if table_bits:
+            ways["decompressBytes"] = lambda: Huffman.decompressBytes(compressed, table_bits)
+            chunks = [compressed[i:i + 5] for i in range(0, len(compressed), 5)]
+            ways["decompressStream"] = lambda: b"".join(Huffman.decompressStream(chunks, table_bits))
+        for name, decode in ways.items():
+            try:
+                if decode() != data:
+                    failed.append(f"{name} (table_bits={table_bits}): wrong output")
+            except Exception as e:
+                failed.append(f"{name} (table_bits={table_bits}): {e}")
+    return failed
+
+def _decompressFile(path, output, table_bits):
+    Huffman.decompress(path, output, table_bits, workers=1)
+    with open(output, "rb") as decompressed:
+        return decompressed.read()
+
+def main(args):
+    rng = random.Random(args.seed)
+    Huffman.registerDictionary(DICTIONARY, freqs=[1] * 256)
+    failures = 0
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "input")
+        for corpus in args.corpora:
+            for size in args.sizes:
+                data = CORPORA[corpus](rng, size)
+                with open(path, "wb") as input_file:
+                    input_file.write(data)
+                for name in args.formats:
+                    compressed = FORMATS[name](path, os.path.join(directory, "output"))
+                    for failure in check(data, compressed, directory):
+                        print(f"{corpus:>8} {size:>6} bytes, {name}: {failure}")
+                        failures += 1
+    print(f"{failures} failures")
+    return failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the table decoders against the tree decoder.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES)
+    parser.add_argument("--corpora", nargs="+", choices=CORPORA, default=list(CORPORA))
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--seed", type=int, default=0)
+    sys.exit(1 if main(parser.parse_args()) else 0)
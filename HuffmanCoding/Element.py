@@ -1,7 +1,11 @@
-from functools import total_ordering
-
-@total_ordering
 class Element:
+    """
+    Key with data, compared by key only.
+    Uses `__slots__` and defines every comparison, since many elements
+        are kept and compared in priority queues.
+    """
+
+    __slots__ = ("key", "data")
 
     def __init__(self,key,data):
         self.key = key
@@ -10,5 +14,23 @@ class Element:
     def __eq__(self,other):
         return self.key == other.key
 
+    def __ne__(self,other):
+        return self.key != other.key
+
     def __lt__(self,other):
-        return self.key < other.key
\ No newline at end of file
+        return self.key < other.key
+
+    def __le__(self,other):
+        return self.key <= other.key
+
+    def __gt__(self,other):
+        return self.key > other.key
+
+    def __ge__(self,other):
+        return self.key >= other.key
+
+    # Equal elements may have different data, so elements are not hashable
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Element({self.key!r}, {self.data!r})"
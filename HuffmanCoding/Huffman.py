@@ -1,7 +1,283 @@
 from bitIO import *
 from Element import Element
 from PQHeap import PQHeap
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from itertools import accumulate, chain, repeat
+from operator import add, lshift, mul, or_
+from tempfile import SpooledTemporaryFile
+from time import perf_counter
+import io
+import mmap
 import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:
+    # NumPy is optional, `Counter` is used for counting without it
+    np = None
+
+# Header of a compressed file, read by `Huffman._parseHeader`.
+# `model` is a `_Model`, or a `_ContextModel` with one set of `lengths` per context.
+# `lengths` and `blocks` are None for the legacy format, `length` is None
+#   for streams, and `blocks` lists (bytes in block, compressed size of block).
+_Header = namedtuple("_Header", ["model", "lengths", "length", "size", "blocks"])
+
+# Statistics of one phase in `HuffmanStats`, summed over all its runs.
+_Phase = namedtuple("_Phase", ["seconds", "bytes_in", "bits_out", "calls"])
+
+class _Model:
+    """
+    The Huffman tree and coding tables of one model, see `Huffman._createModel`.
+    Decoding tables are created when first needed.
+    """
+
+    def __init__(self, tree, table):
+        self.tree = tree
+        self.trees = [tree] * 256 # tree of each context, see `_ContextModel`
+        self.table = table # as made by `Huffman._createLookupTable`
+        # Codes as bit strings (for `_Encoder`), eg. (0b101, 3) => "101"
+        self.codes = [format(entry[0], f"0{entry[1]}b") if entry else None for entry in table]
+        self.decode_tables = {} # map from number of bits to decoding table
+
+    def decodeTable(self, table_bits):
+        """
+        Returns the decoding table of `table_bits` bits and the length
+            of the longest code, see `Huffman._createDecodeTable`.
+        """
+        if table_bits not in self.decode_tables:
+            self.decode_tables[table_bits] = Huffman._createDecodeTable(self.tree, table_bits)
+        return self.decode_tables[table_bits]
+
+    def encoder(self):
+        """
+        Returns an `_Encoder` using this model.
+        """
+        return _Encoder(self)
+
+    def decoder(self, count, table_bits):
+        """
+        Returns a `_Decoder` of `count` bytes using this model.
+        """
+        table, max_bits = self.decodeTable(table_bits)
+        return _Decoder([table] * 256, max_bits, count, table_bits)
+
+class _ContextModel:
+    """
+    An order-1 context model, with a `_Model` for each context, that is for
+        each value of the previous byte (0 before the first byte).
+    Contexts that never occur have no model (None).
+    """
+
+    def __init__(self, models):
+        self.models = models
+        self.trees = [model.tree if model else None for model in models]
+        # Codes as bit strings of every pair (context, byte), indexed by
+        #   context << 8 | byte, so pairs are looked up like single bytes
+        no_codes = [None] * 256
+        self.codes = [code for model in models for code in (model.codes if model else no_codes)]
+
+    def encoder(self):
+        """
+        Returns a `_ContextEncoder` using this model.
+        """
+        return _ContextEncoder(self)
+
+    def decoder(self, count, table_bits):
+        """
+        Returns a `_Decoder` of `count` bytes using this model.
+        """
+        # Unused contexts get a table without codes
+        no_codes = ([None] * (1 << table_bits), 0)
+        tables = [model.decodeTable(table_bits) if model else no_codes for model in self.models]
+        return _Decoder([table for table, _ in tables], max(bits for _, bits in tables), count, table_bits)
+
+class _Encoder:
+    """
+    Encodes bytes using the codes of a `_Model`.
+
+    Rather than writing bit by bit, the codes of a whole chunk are joined
+        into one wide bit string, which is converted to an int and written
+        as whole bytes. Bits not filling a byte are kept for the next chunk.
+    The output is the same as writing every code with `BitWriter.writebit`.
+    """
+
+    def __init__(self, model):
+        self.codes = model.codes
+        self.pending = "" # bits not yet making up a whole byte
+
+    def update(self, data):
+        """
+        Encodes the bytes in `data` and returns the completed output bytes.
+        """
+        try:
+            bits = self.pending + "".join(map(self.codes.__getitem__, self._symbols(data)))
+        except TypeError:
+            # `join` found None
+            raise Exception("Input contains a byte without a code")
+        n = len(bits) >> 3 # number of whole bytes
+        self.pending = bits[n << 3:]
+        if not n:
+            return b""
+        return int(bits[:n << 3], 2).to_bytes(n, "big")
+
+    def flush(self):
+        """
+        Returns the pending bits right-filled with 0's to a full byte
+            (like `BitWriter.flush`), or nothing if no bits are pending.
+        """
+        bits, self.pending = self.pending, ""
+        if not bits:
+            return b""
+        return int(bits.ljust(8, "0"), 2).to_bytes(1, "big")
+
+    def _symbols(self, data):
+        # Indices of the codes of `data`
+        return data
+
+class _ContextEncoder(_Encoder):
+    """
+    Encodes bytes using the codes of a `_ContextModel`,
+        looking up the code of each byte along with the byte before it.
+    """
+
+    def __init__(self, model):
+        super().__init__(model)
+        self.last = 0 # the byte before the next, 0 at the start
+
+    def _symbols(self, data):
+        # Pairs (context, byte) as context << 8 | byte, computed in C by `map`
+        contexts = map(lshift, chain((self.last,), data), repeat(8))
+        if len(data):
+            self.last = data[-1]
+        return map(or_, contexts, data)
+
+class _Decoder:
+    """
+    Decodes `count` bytes using the decoding tables of a `_Model` or a
+        `_ContextModel`, one table for each context. The table to look up
+        is switched after each byte, a `_Model` has the same in all contexts.
+
+    Input is fed in chunks, which are unpacked to 64-bit words and shifted
+        into an int accumulator. Each symbol is decoded by looking up the
+        next `table_bits` bits, only codes longer than that walk the tree.
+    A symbol is only decoded once the accumulator holds at least as many
+        bits as the longest code, so `finish` pads the end of input with 0's.
+    """
+
+    def __init__(self, tables, max_bits, count, table_bits):
+        self.tables = tables # decoding table of each context, see `_ContextModel`
+        self.last = 0 # the last byte decoded, 0 at the start
+        self.table_bits = table_bits
+        self.need = max(max_bits, table_bits) # bits needed to decode any code
+        if count < 0:
+            # The last fed byte may end with padding (up to 7 bits), which
+            #   must not be decoded before `finish` knows how long it is
+            self.need = max(self.need, 8)
+        self.count = count # number of bytes left to decode, negative if unknown
+        self.accumulator = 0
+        self.bcount = 0 # number of unread bits in the accumulator
+        self.pending = b"" # bytes not making up a whole 64-bit word
+
+    def feed(self, data):
+        """
+        Feeds the bytes in `data`, and returns the bytes decoded so far.
+        """
+        words = ()
+        start = 0 # offset of the first whole word in `data`
+        if self.pending:
+            # Complete the pending word with the first bytes of `data`,
+            #   rather than copying all of `data` after the pending bytes
+            start = 8 - len(self.pending)
+            word = self.pending + bytes(data[:start])
+            if len(word) < 8:
+                self.pending = word
+                return bytearray()
+            words = (int.from_bytes(word, "big"),)
+        n = (len(data) - start) >> 3 # number of whole words
+        self.pending = bytes(data[start + (n << 3):])
+        return self._decode(chain(words, struct.unpack_from(f">{n}Q", data, start)))
+
+    def finish(self, pad=0):
+        """
+        Decodes the remaining bytes from the last fed bits, ignoring the
+            last `pad` bits, and returns them. Fails if the input ends too early.
+        If the number of bytes is unknown (negative `count`),
+            decodes until the bits run out.
+        """
+        pending, self.pending = self.pending, b""
+        n = len(pending) << 3
+        self.accumulator = (self.accumulator & (1 << self.bcount) - 1) << n | int.from_bytes(pending, "big")
+        self.bcount += n - pad
+        self.accumulator >>= pad
+
+        if self.bcount < 0:
+            raise Exception("Not enough data, unexpected EOF")
+
+        # Pad with 0's, so the last code can be looked up
+        self.accumulator <<= self.need
+        self.bcount += self.need
+
+        if self.count < 0:
+            # Decode one byte at a time, until only the 0's are left
+            output = bytearray()
+            while self.bcount > self.need:
+                self.count = 1
+                output += self._decode(())
+            self.count = 0
+        else:
+            output = self._decode(())
+
+        if self.count or self.bcount < self.need:
+            # Ran out of symbols, or the last symbol used the padding
+            raise Exception("Not enough data, unexpected EOF")
+        return output
+
+    def _decode(self, words):
+        output = bytearray()
+        tables, need = self.tables, self.need
+        table = tables[self.last]
+        shift = self.table_bits
+        mask = (1 << shift) - 1
+        acc, bcount, count = self.accumulator, self.bcount, self.count
+        words = iter(words)
+
+        while count:
+            if bcount < need:
+                # Refill accumulator, dropping bits already read
+                word = next(words, None)
+                if word is None:
+                    break
+                acc = (acc & (1 << bcount) - 1) << 64 | word
+                bcount += 64
+                continue
+
+            entry = table[acc >> bcount - shift & mask]
+            if entry is None:
+                raise Exception("Invalid code")
+            byte, bits = entry
+            if not bits:
+                # Code is longer than the table, walk the rest of the tree
+                x, i = byte, bcount - shift
+                while len(x) == 2:
+                    i -= 1
+                    x = x[acc >> i & 1] # 0 => left, 1 => right
+                    if x is None:
+                        raise Exception("Invalid code")
+                byte, bits = x[0], bcount - i
+
+            output.append(byte)
+            bcount -= bits
+            count -= 1
+            table = tables[byte]
+
+        if output:
+            self.last = output[-1]
+        self.accumulator, self.bcount, self.count = acc, bcount, count
+        return output
 
 class Huffman:
     """
@@ -12,7 +288,96 @@ class Huffman:
     - Silas Pockendahl (silch20)
     """
 
-    HEADER_SIZE = 1024
+    HEADER_SIZE = 1024 # size of the legacy frequency header
+    MAGIC = b"HUF" # start of the canonical format
+    LENGTHS_RAW, LENGTHS_RLE = 0, 1 # ways of packing code lengths
+    FLAG_STREAMED = 1 # format flag, the length is unknown when writing the header
+    FLAG_BLOCKS = 2 # format flag, the input is encoded in independent blocks
+    FLAG_DICTIONARY = 4 # format flag, the model is a shared dictionary
+    FLAG_CONTEXT = 8 # format flag, the model is an order-1 context model
+    FORMATS = { # supported combinations of format flags
+        0, FLAG_STREAMED, FLAG_BLOCKS, FLAG_DICTIONARY, FLAG_CONTEXT,
+        FLAG_STREAMED | FLAG_DICTIONARY, FLAG_BLOCKS | FLAG_DICTIONARY
+    }
+    CHUNK_SIZE = 1 << 20 # bytes read from the input at a time
+    BLOCK_SIZE = 1 << 22 # bytes per block, when compressing in parallel
+    SPOOL_SIZE = 1 << 26 # bytes kept in memory by `HuffmanEncoder` without a model
+    DECODE_TABLE_BITS = 10 # default `table_bits` of decoding, bound when the methods are defined
+    MAX_CODE_BITS = 15 # longest canonical code, read when codes are made, None for no limit
+    MODEL_CACHE_SIZE = 128 # number of models kept by `_createModel`
+
+    _dictionaries = {} # map from ID to code lengths of shared models
+
+    def _addFrequencies(freqs, chunk):
+        """
+        Adds the number of occurrences of each byte in `chunk`
+            to the map (list) `freqs` from byte to frequency.
+        """
+        if np is not None:
+            counts = np.bincount(np.frombuffer(chunk, dtype=np.uint8), minlength=256)
+            freqs[:] = map(add, freqs, counts.tolist())
+        else:
+            # Iterating bytes yields ints, counted in C by `Counter`
+            for byte, count in Counter(chunk).items():
+                freqs[byte] += count
+
+    def _addPairFrequencies(freqs, chunk, last):
+        """
+        Adds the number of occurrences of each pair (context, byte) in `chunk`,
+            where the context is the byte before (`last` before the first),
+            to the map (list) `freqs` from context << 8 | byte to frequency.
+        """
+        if np is not None:
+            data = np.frombuffer(chunk, dtype=np.uint8)
+            contexts = np.empty(len(data), dtype=np.int64)
+            contexts[:1] = last
+            contexts[1:] = data[:-1]
+            counts = np.bincount(contexts << 8 | data, minlength=1 << 16)
+            freqs[:] = map(add, freqs, counts.tolist())
+        else:
+            pairs = map(or_, map(lshift, chain((last,), chunk), repeat(8)), chunk)
+            for pair, count in Counter(pairs).items():
+                freqs[pair] += count
+
+    def _countPairFrequencies(input_file):
+        """
+        Counts the pairs (context, byte) of the (binary) file object
+            `input_file`, see `_addPairFrequencies`, starting in context 0.
+        Returns a map (list) from context << 8 | byte to frequency.
+        """
+        freqs = [0] * (1 << 16)
+        last = 0
+        chunk = input_file.read(Huffman.CHUNK_SIZE)
+        while chunk:
+            Huffman._addPairFrequencies(freqs, chunk, last)
+            last = chunk[-1]
+            chunk = input_file.read(Huffman.CHUNK_SIZE)
+        return freqs
+
+    def _createContextLengths(freqs):
+        """
+        Returns a list of the code lengths of each context (see `_createCodeLengths`),
+            given a map (list) from context << 8 | byte to frequency.
+        Contexts that never occur have no code lengths (None).
+        """
+        lengths = []
+        for context in range(256):
+            context_freqs = freqs[context << 8:context + 1 << 8]
+            lengths.append(Huffman._createCodeLengths(context_freqs) if any(context_freqs) else None)
+        return lengths
+
+    def _countFrequencies(input_file):
+        """
+        Counts the bytes of the (binary) file object `input_file`,
+            reading it in chunks of `CHUNK_SIZE` bytes.
+        Returns a map (list) from byte to frequency.
+        """
+        freqs = [0] * 256
+        chunk = input_file.read(Huffman.CHUNK_SIZE)
+        while chunk:
+            Huffman._addFrequencies(freqs, chunk)
+            chunk = input_file.read(Huffman.CHUNK_SIZE)
+        return freqs
 
     def _createHuffmanTree(freqs):
         """
@@ -61,94 +426,1164 @@ class Huffman:
         recurse(tree, 0, 0)
         return lookup
 
-    def compress(input_file, output_file):
+    def _createDecodeTable(tree, table_bits):
+        """
+        Create a decoding table for a Huffman tree,
+            indexed by the next `table_bits` bits of input.
+        Codes of at most `table_bits` bits map to a tuple (byte, num_of_bits),
+            for every value of the bits following the code.
+        Longer codes map to a tuple (subtree, 0), where `subtree` is the node
+            reached after `table_bits` bits, and invalid codes map to None.
+        Returns the table and the length of the longest code.
+        """
+        table = [None] * (1 << table_bits)
+        max_bits = 0
+
+        # Function for recursive tree traversal
+        def recurse(subtree, code, num_of_bits):
+            nonlocal max_bits
+            if subtree is None:
+                # No codes in this branch, entries stay None
+                return
+            if len(subtree) == 1:
+                # `subtree` is a leaf
+                max_bits = max(max_bits, num_of_bits)
+                if num_of_bits <= table_bits:
+                    shift = table_bits - num_of_bits
+                    table[code << shift:code + 1 << shift] = [(subtree[0], num_of_bits)] * (1 << shift)
+            else:
+                if num_of_bits == table_bits:
+                    # Codes continue past the table
+                    table[code] = (subtree, 0)
+                recurse(subtree[0], code << 1, num_of_bits + 1)     # left  => 0
+                recurse(subtree[1], code << 1 | 1, num_of_bits + 1) # right => 1
+
+        # Start recursion
+        recurse(tree, 0, 0)
+        return table, max_bits
+
+    def _createCodeLengths(freqs, max_bits=None):
+        """
+        Returns a map (list) from byte to the length of its Huffman code,
+            given a map (list) from byte to frequency.
+        Bytes with frequency 0 get length 0, meaning no code.
+        No code is longer than `max_bits` bits, `MAX_CODE_BITS` if None,
+            and there is no limit if that is None or 0.
+        Unlike `_createHuffmanTree`, only the used bytes are sorted once,
+            after which the lengths are found in linear time.
+        """
+        if max_bits is None:
+            max_bits = Huffman.MAX_CODE_BITS
+        lengths = [0] * 256
+        symbols = sorted((byte for byte in range(256) if freqs[byte]), key=freqs.__getitem__)
+        if len(symbols) == 1:
+            # A single byte still needs a code of one bit
+            lengths[symbols[0]] = 1
+        elif symbols:
+            weights = [freqs[byte] for byte in symbols]
+            depths = Huffman._createSortedLengths(weights)
+            if max_bits and max(depths) > max_bits:
+                depths = Huffman._createLimitedLengths(weights, max_bits)
+            for byte, num_of_bits in zip(symbols, depths):
+                lengths[byte] = num_of_bits
+        return lengths
+
+    def _createSortedLengths(weights):
+        """
+        Returns the Huffman code lengths of at least two symbols, given
+            their frequencies `weights` in increasing order.
+        Uses two queues, the leaves and the merged nodes, which are both
+            sorted, such that the smallest node is always at one of the fronts.
+        """
+        n = len(weights)
+        weight = weights + [0] * (n - 1)
+        parent = [0] * (2 * n - 1)
+        leaf, node = 0, n # fronts of the two queues
+
+        for merged in range(n, 2 * n - 1):
+            for i in range(2):
+                # Take the smallest front, leaves first on ties
+                if leaf < n and (node == merged or weight[leaf] <= weight[node]):
+                    child, leaf = leaf, leaf + 1
+                else:
+                    child, node = node, node + 1
+                weight[merged] += weight[child]
+                parent[child] = merged
+
+        # Parents come after their children, so depths are found backwards
+        depth = [0] * (2 * n - 1)
+        for child in range(2 * n - 3, -1, -1):
+            depth[child] = depth[parent[child]] + 1
+        return depth[:n]
+
+    def _createLimitedLengths(weights, max_bits):
+        """
+        Returns the optimal code lengths of at most `max_bits` bits of at least
+            two symbols, given their frequencies `weights` in increasing order.
+        Uses the package-merge algorithm: each level holds the symbols and
+            the pairs (packages) of the level below, and the 2n - 2 cheapest
+            items of the top level tell how often each symbol is chosen.
+        """
+        n = len(weights)
+        if n > 1 << max_bits:
+            raise Exception("Too many symbols for codes of {} bits".format(max_bits))
+
+        # Items are tuples (weight, is_package), leaves sort first on ties
+        leaves = [(w, False) for w in weights]
+        levels = [leaves]
+        for i in range(max_bits - 1):
+            items = levels[-1]
+            packages = [(items[j][0] + items[j + 1][0], True) for j in range(0, len(items) - 1, 2)]
+            levels.append(sorted(leaves + packages))
+
+        # Leaves are chosen in order, so the chosen leaves of a level are a prefix
+        lengths = [0] * n
+        take = 2 * n - 2
+        for items in reversed(levels):
+            packages = sum(is_package for _, is_package in items[:take])
+            for j in range(take - packages):
+                lengths[j] += 1
+            take = 2 * packages
+        return lengths
+
+    def _createCanonicalTable(lengths):
+        """
+        Create a lookup table of canonical Huffman codes from code lengths.
+        Codes are assigned in order of length, then byte, such that the
+            codes can be derived from the lengths alone.
+        The table maps bytes to a tuple (code, num_of_bits), like
+            `_createLookupTable`, and bytes without a code to None.
+        """
+        lookup = [None] * 256
+        code = num_of_bits = 0
+
+        # `sorted` is stable, so bytes of equal length stay in order
+        for byte in sorted((b for b in range(256) if lengths[b]), key=lengths.__getitem__):
+            code <<= lengths[byte] - num_of_bits
+            num_of_bits = lengths[byte]
+            lookup[byte] = (code, num_of_bits)
+            code += 1
+
+        return lookup
+
+    def _createCanonicalTree(lengths):
+        """
+        Creates the Huffman tree of the canonical codes given by `lengths`,
+            without building it from frequencies.
+        Branches without any codes are None.
+        """
+        tree = [None, None]
+        for byte, entry in enumerate(Huffman._createCanonicalTable(lengths)):
+            if entry:
+                code, num_of_bits = entry
+                x = tree
+                # Create the path of the code, then put the leaf at its end
+                for i in range(num_of_bits - 1, 0, -1):
+                    bit = code >> i & 1
+                    if x[bit] is None:
+                        x[bit] = [None, None]
+                    x = x[bit]
+                x[code & 1] = [byte]
+        return tree
+
+    @lru_cache(maxsize=MODEL_CACHE_SIZE)
+    def _createModel(table, legacy=False, context=False):
+        """
+        Creates the `_Model` of the canonical codes given by the lengths in
+            `table` (a tuple), without building a tree from frequencies.
+        If `legacy` is set, `table` holds byte frequencies instead, and the
+            model is built from the tree made by `_createHuffmanTree`.
+        If `context` is set, `table` holds code lengths (or None) for each
+            context, and a `_ContextModel` is created.
+        The most recently used models are cached, see `cacheInfo`.
+        """
+        if legacy:
+            tree = Huffman._createHuffmanTree(table)
+            return _Model(tree, Huffman._createLookupTable(tree))
+        if context:
+            return _ContextModel([
+                _Model(Huffman._createCanonicalTree(lengths), Huffman._createCanonicalTable(lengths))
+                    if lengths else None for lengths in table
+            ])
+        return _Model(Huffman._createCanonicalTree(table), Huffman._createCanonicalTable(table))
+
+    def _contextKey(lengths):
+        """
+        Returns the code lengths of each context as a tuple of tuples,
+            the key of the model in `_createModel`.
+        """
+        return tuple(tuple(lengths) if lengths else None for lengths in lengths)
+
+    def cacheInfo():
+        """
+        Returns the hits, misses, maximum size and current size
+            of the cache of models.
+        """
+        return Huffman._createModel.cache_info()
+
+    def clearCache():
+        """
+        Empties the cache of models, and resets its statistics.
+        """
+        Huffman._createModel.cache_clear()
+
+    def registerDictionary(dictionary, lengths=None, freqs=None):
+        """
+        Registers a shared model with the ID `dictionary` (a non-negative int),
+            given as code `lengths` or as byte `freqs` (eg. of training data).
+        Data compressed with a dictionary refers to it by ID instead of
+            holding the model, so the same dictionary must be registered
+            to decompress it. Bytes without a code can not be compressed.
+        """
+        if freqs is not None:
+            lengths = Huffman._createCodeLengths(freqs)
+        if dictionary < 0 or lengths is None or len(lengths) != 256:
+            raise ValueError("Dictionary needs a non-negative ID and 256 code lengths")
+        Huffman._dictionaries[dictionary] = tuple(lengths)
+
+    def _dictionary(dictionary):
+        """
+        Returns the code lengths of the registered shared model `dictionary`.
+        """
+        if dictionary not in Huffman._dictionaries:
+            raise Exception(f"Unknown dictionary {dictionary}")
+        return Huffman._dictionaries[dictionary]
+
+    def _packVarint(n):
+        """
+        Packs the non-negative int `n` into 7 bits per byte,
+            where the high bit is set on all but the last byte.
+        """
+        packed = bytearray()
+        while n > 0x7f:
+            packed.append(n & 0x7f | 0x80)
+            n >>= 7
+        packed.append(n)
+        return bytes(packed)
+
+    def _unpackVarint(data, pos):
+        """
+        Unpacks an int packed by `_packVarint` at `pos` in `data`.
+        Returns the int and the position after it.
+        """
+        n = shift = 0
+        while True:
+            byte = data[pos]
+            pos += 1
+            n |= (byte & 0x7f) << shift
+            shift += 7
+            if byte < 0x80:
+                return n, pos
+
+    def _packLengths(lengths):
+        """
+        Packs the 256 code lengths, either as one byte each,
+            or run-length encoded as pairs of (run length - 1, code length),
+            whichever is shorter. The first byte tells which.
+        """
+        runs = bytearray()
+        byte = 0
+        while byte < 256:
+            run = 1
+            while byte + run < 256 and lengths[byte + run] == lengths[byte]:
+                run += 1
+            runs += bytes((run - 1, lengths[byte]))
+            byte += run
+
+        if len(runs) < 256:
+            return bytes((Huffman.LENGTHS_RLE,)) + runs
+        return bytes((Huffman.LENGTHS_RAW, *lengths))
+
+    def _unpackLengths(data, pos):
+        """
+        Unpacks code lengths packed by `_packLengths` at `pos` in `data`.
+        Returns the lengths and the position after them.
+        """
+        kind = data[pos]
+        pos += 1
+
+        if kind == Huffman.LENGTHS_RAW:
+            if pos + 256 > len(data):
+                raise IndexError # not enough data
+            return list(data[pos:pos + 256]), pos + 256
+
+        lengths = []
+        while len(lengths) < 256:
+            lengths += [data[pos + 1]] * (data[pos] + 1)
+            pos += 2
+        if len(lengths) != 256:
+            raise Exception("Invalid header")
+        return lengths, pos
+
+    def _packContexts(lengths):
+        """
+        Packs the code lengths of each context (None if unused), as a map
+            of the used contexts (256 bits), followed by their packed lengths.
+        """
+        used = sum(1 << context for context in range(256) if lengths[context] is not None)
+        return used.to_bytes(32, "big") + b"".join(map(Huffman._packLengths, filter(None, lengths)))
+
+    def _unpackContexts(data, pos):
+        """
+        Unpacks code lengths packed by `_packContexts` at `pos` in `data`.
+        Returns the lengths of each context and the position after them.
+        """
+        if pos + 32 > len(data):
+            raise IndexError # not enough data
+        used = int.from_bytes(data[pos:pos + 32], "big")
+        pos += 32
+
+        lengths = [None] * 256
+        for context in range(256):
+            if used >> context & 1:
+                lengths[context], pos = Huffman._unpackLengths(data, pos)
+        return lengths, pos
+
+    def _writeHeader(lengths, length=None, block_size=None, block_sizes=(), dictionary=None, context=False):
+        """
+        Returns the header of the canonical format,
+            given the code lengths and the number of bytes encoded.
+        If `length` is None, the header starts a stream of unknown length,
+            which ends with a byte telling the number of padding bits.
+        If `block_size` is given, the input is encoded in independent blocks
+            of that many bytes, and the header ends with the compressed size
+            of each block.
+        If `dictionary` is given, the header refers to the shared model
+            registered with that ID, instead of holding the code lengths.
+        If `context` is set, `lengths` holds the code lengths of each context
+            of an order-1 model (see `_ContextModel`).
+        """
+        flags = 0
+        fields = []
+
+        if length is None:
+            flags |= Huffman.FLAG_STREAMED
+        else:
+            fields.append(Huffman._packVarint(length))
+
+        if context:
+            flags |= Huffman.FLAG_CONTEXT
+            fields.append(Huffman._packContexts(lengths))
+        elif dictionary is None:
+            fields.append(Huffman._packLengths(lengths))
+        else:
+            flags |= Huffman.FLAG_DICTIONARY
+            fields.append(Huffman._packVarint(dictionary))
+
+        if block_size is not None:
+            flags |= Huffman.FLAG_BLOCKS
+            fields.append(Huffman._packVarint(block_size))
+            fields.extend(map(Huffman._packVarint, block_sizes))
+
+        return Huffman.MAGIC + bytes((flags,)) + b"".join(fields)
+
+    def _parseHeader(data):
+        """
+        Parses the header at the start of `data`, in either format.
+        Returns a `_Header`, or raises IndexError if `data` ends too early.
+        """
+        # Compared by slicing, as `data` may be any buffer (eg. memoryview)
+        if data[:len(Huffman.MAGIC)] != Huffman.MAGIC:
+            if len(data) < Huffman.HEADER_SIZE:
+                raise IndexError # not enough data
+
+            freqs = [int.from_bytes(data[i:i+4], "big") for i in range(0, Huffman.HEADER_SIZE, 4)]
+
+            # Frequency table => Huffman tree
+            return _Header(Huffman._createModel(tuple(freqs), True), None, sum(freqs), Huffman.HEADER_SIZE, None)
+
+        pos = len(Huffman.MAGIC)
+        flags = data[pos]
+        pos += 1
+        if flags not in Huffman.FORMATS:
+            raise Exception("Unsupported format")
+
+        length = None
+        if not flags & Huffman.FLAG_STREAMED:
+            length, pos = Huffman._unpackVarint(data, pos)
+
+        if flags & Huffman.FLAG_CONTEXT:
+            lengths, pos = Huffman._unpackContexts(data, pos)
+            model = Huffman._createModel(Huffman._contextKey(lengths), context=True)
+            return _Header(model, lengths, length, pos, None)
+
+        if flags & Huffman.FLAG_DICTIONARY:
+            dictionary, pos = Huffman._unpackVarint(data, pos)
+            lengths = Huffman._dictionary(dictionary)
+        else:
+            lengths, pos = Huffman._unpackLengths(data, pos)
+
+        blocks = None
+        if flags & Huffman.FLAG_BLOCKS:
+            # List of (bytes in block, compressed size of block)
+            block_size, pos = Huffman._unpackVarint(data, pos)
+            blocks = []
+            for offset in range(0, length, block_size):
+                size, pos = Huffman._unpackVarint(data, pos)
+                blocks.append((min(block_size, length - offset), size))
+
+        # Code lengths => canonical Huffman model
+        return _Header(Huffman._createModel(tuple(lengths)), lengths, length, pos, blocks)
+
+    def _readHeader(input_file):
+        """
+        Reads the header from the start of the binary file object `input_file`,
+            and leaves the file right after the header. Returns a `_Header`.
+        """
+        data = b""
+        while True:
+            more = input_file.read(Huffman.HEADER_SIZE)
+            data += more
+            try:
+                header = Huffman._parseHeader(data)
+            except IndexError:
+                if not more:
+                    # not enough data for header
+                    raise Exception("Could not read header (too short)")
+                continue
+            input_file.seek(header.size - len(data), os.SEEK_CUR)
+            return header
+
+    def _chunks(source):
+        """
+        Returns an iterable of the chunks of `source`,
+            which is a binary file object or already an iterable of chunks.
+        """
+        if hasattr(source, "read"):
+            return iter(lambda: source.read(Huffman.CHUNK_SIZE), b"")
+        return source
+
+    def _executor(workers):
+        """
+        Returns a pool of `workers` processes (one per CPU if None) as a
+            context manager, or a dummy context manager if `workers` is 1.
+        """
+        if workers == 1:
+            return nullcontext()
+        return ProcessPoolExecutor(workers)
+
+    def _countBlock(input_file, offset, size):
+        """
+        Counts the bytes of the block of `size` bytes at `offset` in `input_file`.
+        """
+        with open(input_file, "rb") as input_file:
+            input_file.seek(offset)
+            freqs = [0] * 256
+            Huffman._addFrequencies(freqs, input_file.read(size))
+            return freqs
+
+    def _encodeBlock(input_file, offset, size, lengths):
+        """
+        Encodes the block of `size` bytes at `offset` in `input_file`,
+            using the canonical codes of `lengths`.
+        """
+        with open(input_file, "rb") as input_file:
+            input_file.seek(offset)
+            encoder = Huffman._createModel(tuple(lengths)).encoder()
+            return encoder.update(input_file.read(size)) + encoder.flush()
+
+    def _decodeBlock(input_file, offset, size, count, lengths, table_bits):
+        """
+        Decodes `count` bytes from the block of `size` bytes at `offset`
+            in `input_file`, using the canonical codes of `lengths`.
+        """
+        with open(input_file, "rb") as input_file:
+            input_file.seek(offset)
+            decoder = Huffman._createModel(tuple(lengths)).decoder(count, table_bits)
+            return bytes(decoder.feed(input_file.read(size)) + decoder.finish())
+
+    def _decodeTree(input_file, model, count, output, end=None):
+        """
+        Decodes `count` bytes (or, if `count` is None, until bit `end`)
+            from the BufferBitReader `input_file`, walking the tree of `model`
+            one bit at a time, and writes them to `output`.
+            Returns the number of bytes written.
+        """
+        if count is not None and isinstance(model, _Model):
+            # A single tree and a known length, without checks per byte
+            tree = model.tree
+            for _ in range(count):
+                x = tree
+                # Traverse tree until a leaf/corresponding byte is found
+                while len(x) == 2:
+                    bit = input_file.readbit()
+                    if not input_file.readsucces():
+                        raise Exception("Not enough data, unexpected EOF")
+                    x = x[bit] # 0 => left, 1 => right
+                    if x is None:
+                        raise Exception("Invalid code")
+                output.write(bytes(x))
+            return count
+
+        written = 0
+        x = [0] # the previous byte, the context of the next one
+        while written != count:
+            # The end of a stream is only checked once per byte
+            if end is not None and input_file.tellbit() >= end:
+                break
+            x = model.trees[x[0]]
+            if x is None:
+                raise Exception("Invalid code")
+            # Traverse tree until a leaf/corresponding byte is found
+            while len(x) == 2:
+                bit = input_file.readbit()
+                if not input_file.readsucces():
+                    raise Exception("Not enough data, unexpected EOF")
+                x = x[bit] # 0 => left, 1 => right
+                if x is None:
+                    raise Exception("Invalid code")
+            output.write(bytes(x))
+            written += 1
+        if end is not None and input_file.tellbit() > end:
+            # The last code went into the padding
+            raise Exception("Not enough data, unexpected EOF")
+        return written
+
+    def compress(input_file, output_file, legacy=False, block_size=None, workers=None, dictionary=None, context=False, stats=None):
         """
         Reads `input_file`, applies Huffman compression and writes to `output_file`.
+        The header holds the lengths of canonical Huffman codes,
+            or all byte frequencies (`HEADER_SIZE` bytes) if `legacy` is set.
+        If `block_size` is given, the input is split into blocks of that many
+            bytes, which are counted and encoded in parallel by `workers`
+            processes (see `_executor`), and can be decoded in parallel.
+            The header then indexes the blocks, so a `HuffmanReader` can
+            seek in the output, decoding only the blocks it reads from.
+        If `dictionary` is given, the shared model registered with that ID
+            is used (see `registerDictionary`), and the input is read once.
+        If `context` is set, each byte is coded by a Huffman code chosen by
+            the byte before it (see `_ContextModel`), which suits text better.
+        If `stats` (a `HuffmanStats`) is given, the phases are measured.
         Returns number of bytes read, and number of bytes written to output file.
         """
 
-        freqs = [0] * 256
+        if context and (legacy or block_size or dictionary is not None):
+            raise ValueError("Context modeling can not be combined with other modes")
+        if legacy and block_size:
+            raise ValueError("Legacy headers can not be combined with blocks")
+        if legacy and dictionary is not None:
+            raise ValueError("Legacy headers can not be combined with dictionaries")
+
+        if block_size:
+            return Huffman._compressBlocks(input_file, output_file, block_size, workers, dictionary, stats)
+
+        # Start of the current phase, only measured with `stats`
+        start = stats and perf_counter()
 
-        # Not necessary for functionality
-        bits_written = 1024 * 8 # header size in bits
-        
         with open(input_file, "rb") as input_file:
 
-            # Count bytes
-            byte = input_file.read(1)
-            while byte:
-                freqs[byte[0]] += 1
-                byte = input_file.read(1)
-            
-            tree = Huffman._createHuffmanTree(freqs)
-            table = Huffman._createLookupTable(tree)
-            
-            # Count output bits ()
-            for byte in range(256):
-                bits_written += table[byte][1] * freqs[byte]
-            
-            # BitWriter handles padding
-            with BitWriter(open(output_file, "wb")) as output:
-
-                # Write frequency header
-                for byte in range(256):
-                    output.writeint32bits(freqs[byte])
-                
+            if dictionary is not None:
+                lengths = Huffman._dictionary(dictionary)
+                model = Huffman._createModel(lengths)
+                if stats:
+                    start = stats.record("model", start)
+                header = Huffman._writeHeader(lengths, os.fstat(input_file.fileno()).st_size, dictionary=dictionary)
+            else:
+                if context:
+                    # Count pairs of bytes
+                    freqs = Huffman._countPairFrequencies(input_file)
+                else:
+                    # Count bytes
+                    freqs = Huffman._countFrequencies(input_file)
+                if stats:
+                    start = stats.record("count", start, input_file.tell())
+
+                if legacy:
+                    model = Huffman._createModel(tuple(freqs), True)
+                    if stats:
+                        start = stats.record("model", start)
+                    # Frequency header, 32 bits (big-endian) per byte
+                    header = b"".join(freq.to_bytes(4, "big") for freq in freqs)
+                else:
+                    if context:
+                        lengths = Huffman._createContextLengths(freqs)
+                        key = Huffman._contextKey(lengths)
+                    else:
+                        lengths = Huffman._createCodeLengths(freqs)
+                        key = tuple(lengths)
+                    if stats:
+                        start = stats.record("lengths", start)
+                    model = Huffman._createModel(key, context=context)
+                    if stats:
+                        start = stats.record("model", start)
+                    header = Huffman._writeHeader(lengths, sum(freqs), context=context)
+
                 # Resets the cursor state
                 input_file.seek(0)
-                
-                # Encode input file
-                byte = input_file.read(1)
-                while byte:
-                    code, bits = table[byte[0]]
-                    byte = input_file.read(1)
-                
-                    # Very similar to `BitWriter._writebits`,
-                    #   writes the bits one by one
-                    while bits > 0:
-                        output.writebit((code >> bits-1) & 1)
-                        bits -= 1
-                    
+
+            if stats:
+                start = stats.record("header", start, 0, 8 * len(header))
+
+            with open(output_file, "wb") as output:
+
+                output.write(header)
+
+                # Encode input file, one chunk at a time
+                encoder = model.encoder()
+                chunk = input_file.read(Huffman.CHUNK_SIZE)
+                while chunk:
+                    output.write(encoder.update(chunk))
+                    chunk = input_file.read(Huffman.CHUNK_SIZE)
+
+                # Encoder handles padding
+                output.write(encoder.flush())
+
+                if stats:
+                    stats.record("encode", start, input_file.tell(), 8 * (output.tell() - len(header)))
+
+                # Return bytes read and bytes written
+                return input_file.tell(), output.tell()
+
+    def _compressBlocks(input_file, output_file, block_size, workers, dictionary, stats=None):
+        """
+        Compresses `input_file` to `output_file` in blocks, see `compress`.
+        """
+        start = stats and perf_counter()
+        input_size = os.path.getsize(input_file)
+        offsets = range(0, input_size, block_size)
+
+        with Huffman._executor(workers) as executor:
+            map_ = executor.map if executor else map
+
+            # Count bytes of each block, then of the whole input
+            block_freqs = list(map_(Huffman._countBlock, repeat(input_file), offsets, repeat(block_size)))
+            if stats:
+                start = stats.record("count", start, input_size)
+            if dictionary is not None:
+                lengths = Huffman._dictionary(dictionary)
+            else:
+                freqs = [sum(counts) for counts in zip(*block_freqs)] or [0] * 256
+                lengths = Huffman._createCodeLengths(freqs)
+                if stats:
+                    start = stats.record("lengths", start)
+
+            # Compressed size of each block is known before encoding it
+            block_sizes = [(sum(map(mul, counts, lengths)) + 7) // 8 for counts in block_freqs]
+            header = Huffman._writeHeader(lengths, input_size, block_size, block_sizes, dictionary)
+            if stats:
+                start = stats.record("header", start, 0, 8 * len(header))
+
+            # Models are created by the workers, as part of encoding
+            with open(output_file, "wb") as output:
+                output.write(header)
+                for data in map_(Huffman._encodeBlock, repeat(input_file), offsets, repeat(block_size), repeat(lengths)):
+                    output.write(data)
+            if stats:
+                stats.record("encode", start, input_size, 8 * sum(block_sizes))
+
         # Return bytes read and bytes written
-        return sum(freqs), (bits_written + 7) // 8
+        return input_size, len(header) + sum(block_sizes)
 
-    def decompress(input_file, output_file):
+    def decompress(input_file, output_file, table_bits=DECODE_TABLE_BITS, workers=None, stats=None):
         """
         Reads `input_file`, applies Huffman decompression and writes to `output_file`.
+        Both the canonical and the legacy format are read.
+        Codes are decoded `table_bits` bits at a time using a lookup table,
+            or bit by bit walking the Huffman tree if `table_bits` is 0.
+        Files compressed in blocks are decoded in parallel by `workers`
+            processes (see `_executor`), unless `table_bits` is 0.
+        If `stats` (a `HuffmanStats`) is given, the phases are measured.
         Returns number of bytes read, and number of bytes written to output file.
         """
 
+        start = stats and perf_counter()
+
         # Not necessary for functionality
         input_size = os.path.getsize(input_file)
-        output_length = 0
+        written = 0
+
+        with open(input_file, "rb") as input_file, open(output_file, "wb") as output:
+
+            header = Huffman._readHeader(input_file)
+            if stats:
+                start = stats.record("header", start, header.size)
+
+            if table_bits and header.blocks:
+                # Offset of each block in the file
+                offsets = list(accumulate((size for _, size in header.blocks), initial=header.size))
+                counts, sizes = zip(*header.blocks)
+
+                with Huffman._executor(workers) as executor:
+                    map_ = executor.map if executor else map
+                    for data in map_(Huffman._decodeBlock, repeat(input_file.name), offsets, sizes,
+                                     counts, repeat(header.lengths), repeat(table_bits)):
+                        output.write(data)
+                        written += len(data)
+
+            elif table_bits:
+                # Decode one chunk at a time, straight from the mapped pages of the file
+                decoder = HuffmanDecoder(table_bits)
+                with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                     memoryview(mapped) as view:
+                    for i in range(0, len(view), Huffman.CHUNK_SIZE):
+                        output.write(decoder.update(view[i:i + Huffman.CHUNK_SIZE]))
+                output.write(decoder.flush())
+                written = decoder.output_length
+
+            else:
+                # Decode bit by bit, straight from the mapped pages of the file
+                with mmap.mmap(input_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+                     BufferBitReader(mapped, 8 * header.size) as bits:
+
+                    if header.blocks:
+                        for count, _ in header.blocks:
+                            written += Huffman._decodeTree(bits, header.model, count, output)
+                            # Skip the padding at the end of the block
+                            bits.alignbyte()
 
-        with BitReader(open(input_file, "rb")) as input_file:
+                    else:
+                        # Position of the last bit, only needed for streams
+                        end = None
+                        if header.length is None:
+                            if input_size == header.size:
+                                raise Exception("Not enough data, unexpected EOF")
+                            end = (input_size - 1) * 8 - mapped[-1]
+                        written = Huffman._decodeTree(bits, header.model, header.length, output, end)
 
-            # Read frequence header
-            freqs = [input_file.readint32bits() for _ in range(256)]
+        if stats:
+            stats.record("decode", start, input_size - header.size, 8 * written)
 
-            if not input_file.readsucces():
+        # Return bytes read and bytes written
+        return input_size, written
+
+    def compressStream(source, lengths=None, freqs=None, dictionary=None):
+        """
+        Generator compressing `source`, a binary file object or an iterable
+            of chunks, yielding the compressed data in chunks.
+        The model is given as in `HuffmanEncoder`.
+        """
+        encoder = HuffmanEncoder(lengths, freqs, dictionary=dictionary)
+        for chunk in Huffman._chunks(source):
+            output = encoder.update(chunk)
+            if output:
+                yield output
+        yield from encoder._finish()
+
+    def decompressStream(source, table_bits=DECODE_TABLE_BITS):
+        """
+        Generator decompressing `source`, a binary file object or an iterable
+            of chunks, yielding the decompressed data in chunks.
+        """
+        decoder = HuffmanDecoder(table_bits)
+        for chunk in Huffman._chunks(source):
+            output = decoder.update(chunk)
+            if output:
+                yield bytes(output)
+        output = decoder.flush()
+        if output:
+            yield bytes(output)
+
+    def compressBytes(data, dictionary=None, context=False):
+        """
+        Returns `data`, a bytes-like object (any buffer of bytes),
+            compressed in the canonical format, as read by `decompress`.
+        Slices of `data` are encoded without copying it.
+        If `dictionary` is given, the shared model registered with that ID
+            is used (see `registerDictionary`).
+        If `context` is set, an order-1 context model is used, see `compress`.
+        """
+        data = memoryview(data).cast("B")
+        if context:
+            if dictionary is not None:
+                raise ValueError("Context modeling can not be combined with other modes")
+            freqs = [0] * (1 << 16)
+            Huffman._addPairFrequencies(freqs, data, 0)
+            lengths = Huffman._createContextLengths(freqs)
+            model = Huffman._createModel(Huffman._contextKey(lengths), context=True)
+        else:
+            if dictionary is not None:
+                lengths = Huffman._dictionary(dictionary)
+            else:
+                freqs = [0] * 256
+                Huffman._addFrequencies(freqs, data)
+                lengths = Huffman._createCodeLengths(freqs)
+            model = Huffman._createModel(tuple(lengths))
+
+        output = [Huffman._writeHeader(lengths, len(data), dictionary=dictionary, context=context)]
+        encoder = model.encoder()
+        for i in range(0, len(data), Huffman.CHUNK_SIZE):
+            output.append(encoder.update(data[i:i + Huffman.CHUNK_SIZE]))
+        output.append(encoder.flush())
+        return b"".join(output)
+
+    def decompressBytes(data, table_bits=DECODE_TABLE_BITS):
+        """
+        Returns the decompressed contents of `data`, a bytes-like object
+            holding compressed data in any format.
+        Slices of `data` are decoded without copying it.
+        """
+        data = memoryview(data).cast("B")
+        try:
+            header = Huffman._parseHeader(data)
+        except IndexError:
+            # not enough data for header
+            raise Exception("Could not read header (too short)")
+        data = data[header.size:]
+
+        if header.blocks is not None:
+            output = bytearray()
+            pos = 0
+            for count, size in header.blocks:
+                decoder = header.model.decoder(count, table_bits)
+                output += decoder.feed(data[pos:pos + size])
+                output += decoder.finish()
+                pos += size
+            return bytes(output)
+
+        if header.length is None:
+            # Stream ends with the number of padding bits
+            if not data:
+                raise Exception("Not enough data, unexpected EOF")
+            decoder = header.model.decoder(-1, table_bits)
+            return bytes(decoder.feed(data[:-1]) + decoder.finish(data[-1]))
+
+        decoder = header.model.decoder(header.length, table_bits)
+        return bytes(decoder.feed(data) + decoder.finish())
+
+class HuffmanEncoder:
+    """
+    Incremental Huffman compression, for data arriving in chunks.
+    Each chunk is given to `update`, which returns the compressed data
+        produced so far, and `flush` returns the rest after the last chunk.
+
+    With a model, given as code `lengths`, as byte `freqs` (eg. counted
+        on a sample) or as the ID of a shared `dictionary`, data is encoded
+        as it arrives, in the streamed format.
+        Bytes without a code in the model can not be encoded.
+    Without a model, data is counted and kept in a temporary file, in memory
+        up to `spool_size` bytes, and is encoded by `flush` in a second pass.
+    """
+
+    def __init__(self, lengths=None, freqs=None, spool_size=Huffman.SPOOL_SIZE, dictionary=None):
+        if dictionary is not None:
+            lengths = Huffman._dictionary(dictionary)
+        elif freqs is not None:
+            lengths = Huffman._createCodeLengths(freqs)
+        self.input_length = 0
+
+        if lengths is None:
+            # Two passes, count while buffering
+            self.freqs = [0] * 256
+            self.buffer = SpooledTemporaryFile(max_size=spool_size)
+            self.encoder = None
+        else:
+            self.encoder = Huffman._createModel(tuple(lengths)).encoder()
+            # Written before any data
+            self.header = Huffman._writeHeader(lengths, dictionary=dictionary)
+
+    def update(self, chunk):
+        """
+        Compresses the bytes in `chunk`, and returns the compressed data so far.
+        """
+        self.input_length += len(chunk)
+
+        if self.encoder is None:
+            Huffman._addFrequencies(self.freqs, chunk)
+            self.buffer.write(chunk)
+            return b""
+
+        output = self.header + self.encoder.update(chunk)
+        self.header = b""
+        return output
+
+    def flush(self):
+        """
+        Returns the rest of the compressed data, after the last chunk.
+        """
+        return b"".join(self._finish())
+
+    def _finish(self):
+        # Generator yielding the rest of the compressed data
+        if self.encoder is None:
+            lengths = Huffman._createCodeLengths(self.freqs)
+            encoder = Huffman._createModel(tuple(lengths)).encoder()
+            yield Huffman._writeHeader(lengths, self.input_length)
+
+            # Second pass over the buffered data
+            self.buffer.seek(0)
+            chunk = self.buffer.read(Huffman.CHUNK_SIZE)
+            while chunk:
+                yield encoder.update(chunk)
+                chunk = self.buffer.read(Huffman.CHUNK_SIZE)
+            self.buffer.close()
+            yield encoder.flush()
+        else:
+            # Stream ends with the number of padding bits
+            pad = -len(self.encoder.pending) % 8
+            yield self.header + self.encoder.flush() + bytes((pad,))
+            self.header = b""
+
+class HuffmanDecoder:
+    """
+    Incremental Huffman decompression of either format.
+    Each chunk of compressed data is given to `update`, which returns the
+        data decoded so far, and `flush` returns the rest after the last chunk.
+    Codes are decoded `table_bits` bits at a time, see `Huffman.decompress`.
+    """
+
+    def __init__(self, table_bits=Huffman.DECODE_TABLE_BITS):
+        self.table_bits = table_bits
+        self.header = None # `_Header`, once it is read
+        self.decoder = None # `_Decoder` of the data, or of the current block
+        self.blocks = None # iterator of the blocks left, if any
+        self.left = 0 # compressed bytes left of the current block
+        self.buffer = b"" # start of the header, or the last byte of a stream
+        self.output_length = 0
+
+    def update(self, chunk):
+        """
+        Decompresses the bytes in `chunk`, and returns the decoded data so far.
+        """
+        if self.header is None:
+            # Only copy `chunk` if the header started in an earlier chunk
+            self.buffer = self.buffer + chunk if self.buffer else chunk
+            try:
+                self.header = Huffman._parseHeader(self.buffer)
+            except IndexError:
+                # The header is not complete yet
+                self.buffer = bytes(self.buffer)
+                return b""
+            return self._start()
+        return self._feed(chunk)
+
+    def flush(self):
+        """
+        Returns the rest of the decoded data, after the last chunk.
+        Fails if the data ended too early.
+        """
+        output = b""
+        if self.header is None:
+            try:
+                self.header = Huffman._parseHeader(self.buffer)
+            except IndexError:
                 # not enough data for header
                 raise Exception("Could not read header (too short)")
-            
-            # Count output bytes
-            output_length = sum(freqs)
+            output = self._start()
 
-            # Frequency table => Huffman tree
-            tree = Huffman._createHuffmanTree(freqs)
-            
-            with open(output_file, "wb") as output:
-                
-                # Repeat for number of characters in output
-                for _ in range(output_length):
-                    x = tree
-                    # Traverse tree until a leaf/corresponding byte is found
-                    while len(x) == 2:
-                        bit = input_file.readbit()
-                        if not input_file.readsucces():
-                            raise Exception("Not enough data, unexpected EOF")
-                        x = x[bit] # 0 => left, 1 => right
-                    output.write(bytes(x))
+        if self.blocks is not None:
+            if self.left or next(self.blocks, None):
+                raise Exception("Not enough data, unexpected EOF")
+            return output
 
-        # Return bytes read and bytes written
-        return input_size, output_length
+        if self.header.length is not None:
+            tail = self.decoder.finish()
+        elif self.buffer:
+            tail = self.decoder.finish(self.buffer[0])
+        else:
+            raise Exception("Not enough data, unexpected EOF")
+
+        self.output_length += len(tail)
+        return output + tail
+
+    def _start(self):
+        # Decodes the data following the header
+        data, self.buffer = self.buffer[self.header.size:], b""
+        if self.header.blocks is not None:
+            self.blocks = iter(self.header.blocks)
+            self._nextBlock()
+        else:
+            count = self.header.length
+            self.decoder = self.header.model.decoder(-1 if count is None else count, self.table_bits)
+        return self._feed(data)
+
+    def _nextBlock(self):
+        # Starts decoding the next block, if any
+        count, self.left = next(self.blocks, (0, 0))
+        self.decoder = self.header.model.decoder(count, self.table_bits)
+
+    def _feed(self, chunk):
+        if self.blocks is not None:
+            output = bytearray()
+            while chunk and self.left:
+                data, chunk = chunk[:self.left], chunk[self.left:]
+                self.left -= len(data)
+                output += self.decoder.feed(data)
+                if not self.left:
+                    # Blocks end with padding to a whole byte
+                    output += self.decoder.finish()
+                    self._nextBlock()
+        else:
+            held = b""
+            if self.header.length is None and chunk:
+                # Hold back the last byte, it may be the end of the stream,
+                #   and feed the one held back before
+                held = self.decoder.feed(self.buffer)
+                chunk, self.buffer = chunk[:-1], bytes(chunk[-1:])
+            output = self.decoder.feed(chunk)
+            if held:
+                output = held + output
+
+        self.output_length += len(output)
+        return output
+
+class HuffmanReader(io.RawIOBase):
+    """
+    Read-only file object of the decompressed contents of `input_file`.
+
+    For files compressed in blocks, the header maps offsets in the contents
+        to blocks, so only the blocks being read from are decoded.
+    Other files are decoded from the start as they are read,
+        and seeking backwards starts over from the beginning.
+    """
+
+    def __init__(self, input_file, table_bits=Huffman.DECODE_TABLE_BITS):
+        self.input = open(input_file, "rb")
+        try:
+            self.header = Huffman._readHeader(self.input)
+        except Exception:
+            # Not a compressed file, do not leave it open
+            self.input.close()
+            raise
+        self.table_bits = table_bits
+        self.position = 0
+
+        if self.header.blocks:
+            # Offset of each block in the file
+            sizes = (size for _, size in self.header.blocks)
+            self.offsets = list(accumulate(sizes, initial=self.header.size))
+            self.block_size = self.header.blocks[0][0]
+            self.cached = None # index of the last decoded block
+            self.data = b"" # contents of the last decoded block
+        else:
+            self._restart()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        self.input.close()
+        super().close()
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            if self.header.length is None:
+                raise io.UnsupportedOperation("length of stream is unknown")
+            offset += self.header.length
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self.position = offset
+        return offset
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def read(self, size=-1):
+        """
+        Reads and returns at most `size` bytes, or everything if negative or None.
+        """
+        if size is None:
+            size = -1
+        if self.header.blocks is not None:
+            return self._readBlocks(size)
+        return self._readStream(size)
+
+    def _readBlocks(self, size):
+        length = self.header.length
+        end = length if size < 0 else min(length, self.position + size)
+
+        output = bytearray()
+        while self.position < end:
+            i, start = divmod(self.position, self.block_size)
+            data = self._block(i)[start:start + end - self.position]
+            output += data
+            self.position += len(data)
+        return bytes(output)
+
+    def _block(self, i):
+        # Contents of block `i`, decoding it unless it was the last one read
+        if self.cached != i:
+            count, size = self.header.blocks[i]
+            self.input.seek(self.offsets[i])
+            decoder = self.header.model.decoder(count, self.table_bits)
+            self.data = bytes(decoder.feed(self.input.read(size)) + decoder.finish())
+            self.cached = i
+        return self.data
+
+    def _restart(self):
+        # Decode from the beginning of the file
+        self.input.seek(0)
+        self.decoder = HuffmanDecoder(self.table_bits)
+        self.decoded = bytearray() # decoded contents from offset `start`
+        self.start = 0
+        self.done = False # is everything decoded?
+
+    def _readStream(self, size):
+        if self.position < self.start:
+            self._restart()
+
+        # Decode until the contents to read are decoded, or there are no more
+        while not self.done and (size < 0 or self.start + len(self.decoded) < self.position + size):
+            chunk = self.input.read(Huffman.CHUNK_SIZE)
+            if chunk:
+                self.decoded += self.decoder.update(chunk)
+            else:
+                self.decoded += self.decoder.flush()
+                self.done = True
+
+            # Drop contents before the current position
+            skip = min(self.position - self.start, len(self.decoded))
+            del self.decoded[:skip]
+            self.start += skip
+
+        i = self.position - self.start
+        data = bytes(self.decoded[i:] if size < 0 else self.decoded[i:i + size])
+        self.position += len(data)
+        return data
+
+class HuffmanStats:
+    """
+    Statistics of the phases of `Huffman.compress` and `Huffman.decompress`,
+        collected when given as their `stats` argument.
+    Compressing has the phases "count", "lengths", "model", "header" and
+        "encode", decompressing "header" and "decode" (which includes creating
+        the model for streams); phases skipped by a format are left out.
+    `phases` maps the name of each phase to a `_Phase` of the seconds spent,
+        bytes read and bits written, summed over all calls.
+    If `callback` is given, it is called with the name and the `_Phase` of
+        a single call of each phase as it ends, e.g. to report metrics.
+    Without `stats`, only the start of a call checks for it.
+    """
+
+    def __init__(self, callback=None):
+        self.phases = {}
+        self.callback = callback
+
+    def record(self, name, start, bytes_in=0, bits_out=0):
+        """
+        Adds a call of phase `name`, which began at `start` (`perf_counter`),
+            and returns the time it ended, the start of the next phase.
+        """
+        end = perf_counter()
+        phase = _Phase(end - start, bytes_in, bits_out, 1)
+        self.phases[name] = _Phase(*map(add, self.phases.get(name, (0, 0, 0, 0)), phase))
+        if self.callback:
+            self.callback(name, phase)
+        return end
+
+    def total(self):
+        """
+        Returns the seconds spent in all phases.
+        """
+        return sum(phase.seconds for phase in self.phases.values())
+
+    def asDict(self):
+        """
+        Returns the phases as a dictionary of dictionaries, e.g. for JSON.
+        """
+        return {name: phase._asdict() for name, phase in self.phases.items()}
+
+    def clear(self):
+        """
+        Forgets all phases.
+        """
+        self.phases.clear()
@@ -2,15 +2,39 @@
 File from previous part of project reused.
 """
 
+import heapq
+
 # module exports are given below
 
 class PQHeap:
     """
     Priority queue implemented with min-heap.
-    Takes integer keys, and implements the following:
+    Takes comparable keys (like integers or `Element`s), and implements the following:
      - insert(key) in lg(n) time
      - extractMin() in lg(n) time
-    
+     - peek() in constant time
+     - pushpop(key) and replace(key) in lg(n) time
+     - heapify(keys) in linear time
+     - merge(other) in linear time
+     - update(data, key), decreaseKey(data, key) and remove(data)
+       in lg(n) time, and find(data) in constant time, if `indexed`
+    Equal keys of `insert` and `extractMin` are handled as they always were,
+        so the order of extraction does not change.
+
+    `kind` selects the heap, all with the operations above:
+     - "binary", the binary heap described here
+     - "4ary", a heap where nodes have 4 children, which has half the
+       levels, so `insert` is faster, while `extractMin` compares more keys
+     - "pairing", a pairing heap (see `_PairingPQHeap`), which inserts,
+       merges and decreases keys in constant time, and extracts
+       in amortized lg(n) time
+    Only the binary heap keeps the order of equal keys described above.
+    If `fast` is set, the binary heap uses the functions of `heapq`, which
+        are faster, but may extract equal keys in another order.
+    If `indexed` is set, keys must be `Element`s with distinct, hashable
+        data, and a map from data to position in the heap is kept,
+        such that the key of any element can be changed.
+
     Authors:
      - Kian Banke Larsen (kilar20)
      - Silas Pockendahl (silch20)
@@ -20,8 +44,39 @@ class PQHeap:
     def createEmptyPQ():
         return PQHeap()
 
-    def __init__(self):
+    _d = 2 # children of each node
+
+    def __new__(cls, keys=(), fast=False, indexed=False, kind="binary"):
+        if cls is PQHeap:
+            if kind not in KINDS:
+                raise Exception(f"Unknown kind of heap: {kind}")
+            if fast and kind != "binary":
+                raise Exception("Only a binary heap can be fast")
+            cls = _HeapqPQHeap if fast else KINDS[kind]
+        return object.__new__(cls)
+
+    def __init__(self, keys=(), fast=False, indexed=False, kind="binary"):
         self._heap = []
+        self._index = {} if indexed else None # data => position in _heap
+        if keys:
+            self.heapify(keys)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, data):
+        """
+        Whether an element with `data` is in the queue
+        Precondition: queue is `indexed`
+        """
+        return data in self._index
+
+    def peek(self):
+        """
+        Returns minimum key, without removing it
+        Precondition: heap is non-empty
+        """
+        return self._heap[0]
 
     def insert(self, key):
         """
@@ -30,14 +85,7 @@ class PQHeap:
         Worst case time complexity: log(n)
         """
         self._heap.append(key)
-        i = len(self._heap) - 1
-        parent = ( i - 1 ) // 2
-
-        # While min-heap property not satisfied ...
-        while parent >= 0 and self._heap[parent] > self._heap[i]:
-            self._swap(i, parent)
-            i = parent
-            parent = ( i - 1 ) // 2
+        self._siftUp(len(self._heap) - 1)
 
     def extractMin(self):
         """
@@ -46,46 +94,455 @@ class PQHeap:
 
         Worst case time complexity: log(n)
         """
-        key = self._heap[0]
-        self._heap[0] = self._heap[-1]
-        self._heap.pop()
+        last = self._heap.pop()
+        if not self._heap:
+            key = last
+        else:
+            key = self._heap[0]
+            self._heap[0] = last
+            self._siftDown(0)
 
-        if len(self._heap):
+        if self._index is not None:
+            del self._index[key.data]
+        return key
 
-            # sift head down, until min-heap property is restored
-            i = 0 # current index
-            while 1:
+    def pushpop(self, key):
+        """
+        Inserts key, then removes and returns minimum key,
+            faster than `insert` followed by `extractMin`
 
-                minI, minKey = i, self._heap[i]
+        Worst case time complexity: log(n)
+        """
+        if self._heap and not key < self._heap[0]:
+            key, self._heap[0] = self._heap[0], key
+            if self._index is not None:
+                del self._index[key.data]
+            self._siftDown(0)
+        return key
+
+    def replace(self, key):
+        """
+        Removes and returns minimum key, then inserts key,
+            faster than `extractMin` followed by `insert`
+        Precondition: heap is non-empty
+
+        Worst case time complexity: log(n)
+        """
+        key, self._heap[0] = self._heap[0], key
+        if self._index is not None:
+            del self._index[key.data]
+        self._siftDown(0)
+        return key
 
-                # child indices
-                left = i * 2 + 1
-                right = left + 1
+    def heapify(self, keys):
+        """
+        Inserts all of `keys`, restoring the min-heap property once,
+            bottom-up, instead of once per key
 
-                if left < len(self._heap) and self._heap[left] < minKey:
-                    minI, minKey = left, self._heap[left]
+        Worst case time complexity: n + k, for k keys
+        """
+        start = len(self._heap)
+        self._heap.extend(keys)
+        if self._index is not None:
+            for i in range(start, len(self._heap)):
+                self._index[self._heap[i].data] = i
+        # Sift down every node with children
+        for i in reversed(range((len(self._heap) + self._d - 2) // self._d)):
+            self._siftDown(i)
 
-                if right < len(self._heap) and self._heap[right] < minKey:
-                    minI, minKey = right, self._heap[right]
+    def merge(self, other):
+        """
+        Moves all keys of other (any kind of queue) into this queue
 
-                if minI == i:
-                    # heap property restored
-                    break
+        Worst case time complexity: n + k, for k keys in other
+        """
+        self.heapify(other._popAll())
 
-                self._swap(i, minI)
-                i = minI
-        
-        return key
-    
-    def _swap(self, i, j):
+    def _popAll(self):
+        """
+        Removes and returns all keys, in no particular order
         """
-        Swaps keys at ```i``` and ```j``` in _heap
+        keys, self._heap = self._heap, []
+        if self._index is not None:
+            self._index.clear()
+        return keys
+
+    def find(self, data):
+        """
+        Returns the element with `data`
+        Precondition: queue is `indexed`
+        """
+        return self._heap[self._index[data]]
+
+    def update(self, data, key):
+        """
+        Changes the key of the element with `data` to key
+        Precondition: queue is `indexed`
+
+        Worst case time complexity: log(n)
+        """
+        i = self._index[data]
+        element = self._heap[i]
+        decreased = key < element.key
+        element.key = key
+        if decreased:
+            self._siftUp(i)
+        else:
+            self._siftDown(i)
+
+    def decreaseKey(self, data, key):
+        """
+        Decreases the key of the element with `data` to key
+        Precondition: queue is `indexed`, key is not larger
+
+        Worst case time complexity: log(n)
+        """
+        element = self._heap[self._index[data]]
+        if element.key < key:
+            raise Exception("New key is larger than current key")
+        element.key = key
+        self._siftUp(self._index[data])
+
+    def remove(self, data):
+        """
+        Removes and returns the element with `data`
+        Precondition: queue is `indexed`
+
+        Worst case time complexity: log(n)
         """
-        self._heap[i], self._heap[j] = \
-            self._heap[j], self._heap[i]
+        i = self._index.pop(data)
+        element = self._heap[i]
+        last = self._heap.pop()
+        if i < len(self._heap):
+            # Fill the hole with the last key, which may move either way
+            self._heap[i] = last
+            self._index[last.data] = i
+            self._siftUp(i)
+            self._siftDown(self._index[last.data])
+        return element
+
+    def _siftUp(self, i):
+        """
+        Moves key at ```i``` up, until min-heap property is restored
+        """
+        heap, index, d = self._heap, self._index, self._d
+        key = heap[i]
+
+        # While min-heap property not satisfied, move parent down
+        while i > 0:
+            parent = ( i - 1 ) // d
+            if not heap[parent] > key:
+                break
+            heap[i] = heap[parent]
+            if index is not None:
+                index[heap[i].data] = i
+            i = parent
+
+        heap[i] = key
+        if index is not None:
+            index[key.data] = i
+
+    def _siftDown(self, i):
+        """
+        Moves key at ```i``` down, until min-heap property is restored
+        """
+        heap, index = self._heap, self._index
+        n = len(heap)
+        key = heap[i]
+
+        while 1:
+
+            minI, minKey = i, key
+
+            # child indices
+            left = i * 2 + 1
+            right = left + 1
+
+            if left < n and heap[left] < minKey:
+                minI, minKey = left, heap[left]
+
+            if right < n and heap[right] < minKey:
+                minI, minKey = right, heap[right]
+
+            if minI == i:
+                # heap property restored
+                break
+
+            # move smallest child up
+            heap[i] = minKey
+            if index is not None:
+                index[minKey.data] = i
+            i = minI
+
+        heap[i] = key
+        if index is not None:
+            index[key.data] = i
+
+class _DaryPQHeap(PQHeap):
+    """
+    `PQHeap` where nodes have 4 children, see `kind`.
+    """
+
+    _d = 4
+
+    def _siftDown(self, i):
+        """
+        Moves key at ```i``` down, until min-heap property is restored
+        """
+        heap, index = self._heap, self._index
+        n = len(heap)
+        key = heap[i]
+
+        while 1:
+
+            minI, minKey = i, key
+
+            # first smallest child, if smaller than key
+            first = i * 4 + 1
+            for child in range(first, min(first + 4, n)):
+                if heap[child] < minKey:
+                    minI, minKey = child, heap[child]
+
+            if minI == i:
+                # heap property restored
+                break
+
+            # move smallest child up
+            heap[i] = minKey
+            if index is not None:
+                index[minKey.data] = i
+            i = minI
+
+        heap[i] = key
+        if index is not None:
+            index[key.data] = i
+
+class _PairingNode:
+    """
+    Node of a `_PairingPQHeap`, holding a key.
+    `prev` is the parent of a first child, else the previous sibling.
+    """
+
+    __slots__ = ("key", "child", "next", "prev")
+
+    def __init__(self, key):
+        self.key = key
+        self.child = self.next = self.prev = None
+
+class _PairingPQHeap(PQHeap):
+    """
+    `PQHeap` implemented with a pairing heap, see `kind`.
+    The root holds the minimum key, and the children of a node are a
+        linked list. Two trees are melded by making the root with the
+        larger key the first child of the other.
+    When the root is removed, its children are melded in pairs from the
+        left, then the pairs are melded from the right.
+    If `indexed`, data is mapped to the node holding it.
+    """
+
+    def __init__(self, keys=(), fast=False, indexed=False, kind="pairing"):
+        self._root = None
+        self._size = 0
+        self._index = {} if indexed else None # data => node
+        if keys:
+            self.heapify(keys)
+
+    def __len__(self):
+        return self._size
+
+    def peek(self):
+        return self._root.key
+
+    def insert(self, key):
+        node = _PairingNode(key)
+        if self._index is not None:
+            self._index[key.data] = node
+        self._root = self._meld(self._root, node)
+        self._size += 1
+
+    def extractMin(self):
+        root = self._root
+        self._root = self._pair(root.child)
+        self._size -= 1
+        if self._index is not None:
+            del self._index[root.key.data]
+        return root.key
+
+    def pushpop(self, key):
+        if self._root is None or key < self._root.key:
+            return key
+        return self.replace(key)
+
+    def replace(self, key):
+        minKey = self.extractMin()
+        self.insert(key)
+        return minKey
+
+    def heapify(self, keys):
+        for key in keys:
+            self.insert(key)
+
+    def merge(self, other):
+        if not isinstance(other, _PairingPQHeap):
+            return self.heapify(other._popAll())
+        if self._index is not None:
+            self._index.update(other._index)
+        self._root = self._meld(self._root, other._root)
+        self._size += other._size
+        other._root, other._size = None, 0
+        if other._index is not None:
+            other._index.clear()
+
+    def find(self, data):
+        return self._index[data].key
+
+    def update(self, data, key):
+        node = self._index[data]
+        if key < node.key.key:
+            self.decreaseKey(data, key)
+        else:
+            # Reinsert the node, now with a larger key
+            self._detach(node)
+            node.key.key = key
+            self._root = self._meld(self._root, node)
+
+    def decreaseKey(self, data, key):
+        node = self._index[data]
+        if node.key.key < key:
+            raise Exception("New key is larger than current key")
+        node.key.key = key
+        if node is not self._root:
+            # The subtree of node stays a heap, meld it with the rest
+            self._cut(node)
+            self._root = self._meld(self._root, node)
+
+    def remove(self, data):
+        node = self._index.pop(data)
+        self._detach(node)
+        self._size -= 1
+        return node.key
+
+    def _popAll(self):
+        keys = []
+        stack = [self._root] if self._root else []
+        while stack:
+            node = stack.pop()
+            keys.append(node.key)
+            if node.child:
+                stack.append(node.child)
+            if node.next:
+                stack.append(node.next)
+        self._root, self._size = None, 0
+        if self._index is not None:
+            self._index.clear()
+        return keys
+
+    def _meld(self, a, b):
+        """
+        Melds the trees of roots a and b, either of which may be None,
+            and returns the new root
+        """
+        if a is None:
+            return b
+        if b is None:
+            return a
+        if b.key < a.key:
+            a, b = b, a
+        # b becomes first child of a
+        b.prev = a
+        b.next = a.child
+        if a.child:
+            a.child.prev = b
+        a.child = b
+        return a
+
+    def _pair(self, first):
+        """
+        Melds the list of trees starting at first into one tree,
+            and returns its root
+        """
+        # First pass, meld pairs from the left
+        pairs = []
+        a = first
+        while a:
+            b = a.next
+            a.prev = a.next = None
+            if b is None:
+                pairs.append(a)
+                break
+            following = b.next
+            b.prev = b.next = None
+            pairs.append(self._meld(a, b))
+            a = following
+
+        # Second pass, meld pairs from the right
+        root = pairs.pop() if pairs else None
+        while pairs:
+            root = self._meld(pairs.pop(), root)
+        return root
+
+    def _cut(self, node):
+        """
+        Unlinks the subtree of node (not the root) from its parent
+        """
+        if node.prev.child is node:
+            node.prev.child = node.next
+        else:
+            node.prev.next = node.next
+        if node.next:
+            node.next.prev = node.prev
+        node.prev = node.next = None
+
+    def _detach(self, node):
+        """
+        Removes node from the heap, keeping its children in the heap
+        """
+        if node is self._root:
+            self._root = self._pair(node.child)
+        else:
+            self._cut(node)
+            self._root = self._meld(self._root, self._pair(node.child))
+        node.child = None
+
+class _HeapqPQHeap(PQHeap):
+    """
+    `PQHeap` using the functions of `heapq`, see `fast`.
+    """
+
+    def __init__(self, keys=(), fast=True, indexed=False, kind="binary"):
+        if indexed:
+            raise Exception("A fast PQHeap can not be indexed")
+        PQHeap.__init__(self, keys)
+
+    def insert(self, key):
+        heapq.heappush(self._heap, key)
+
+    def extractMin(self):
+        return heapq.heappop(self._heap)
+
+    def pushpop(self, key):
+        return heapq.heappushpop(self._heap, key)
+
+    def replace(self, key):
+        return heapq.heapreplace(self._heap, key)
+
+    def heapify(self, keys):
+        self._heap.extend(keys)
+        heapq.heapify(self._heap)
+
+# kinds of heap, see `PQHeap`
+KINDS = {
+    "binary": PQHeap,
+    "4ary": _DaryPQHeap,
+    "pairing": _PairingPQHeap,
+}
 
 # required exports:
 
 createEmptyPQ = PQHeap.createEmptyPQ
-insert = PQHeap.insert
-extractMin = PQHeap.extractMin
\ No newline at end of file
+
+def insert(pq, key):
+    pq.insert(key)
+
+def extractMin(pq):
+    return pq.extractMin()
@@ -1,7 +1,8 @@
 # Note: When a BitReader is instantiated, it must be given as argument a file
 # object opened in binary reading mode ('rb'). When a BitWriter is
 # instantiated, it must be given as argument a file object opened in binary
-# writing mode ('wb').
+# writing mode ('wb'). A BufferBitReader is instead given any object with
+# the buffer protocol, like bytes, a memoryview, an mmap or a NumPy array.
 
 # Code is based on http://rosettacode.org/wiki/Bitwise_IO#Python, with changes
 # by Rolf Fagerberg.
@@ -21,13 +22,29 @@
 # functionality. If on the other hand flush() is not called after writing has
 # finished , the last bits written (up to 7) may be lost.
 
+# Besides single bits, n bits can be written or read at a time (writebits,
+# readbits, peekbits), using a constant number of int operations, and a
+# BitWriter can write a whole sequence of (code, length) pairs (writecodes).
+# A BitReader reads the file in large chunks, so it may read past the last bit
+# used; bits are taken from the chunk up to 64 at a time.
+
+# A BitWriter collects the full bytes in a buffer, which is written to the
+# file when it holds buffer_size bytes (given when instantiated), and by
+# flush(). Hence flush() must also be called before the file is used directly.
+
 # If a BitWriter is instantiated via a "with ... as ..." statement, flush()
 # will automatically be called (via the __exit__() method).
 
 class BitWriter(object): # "(object)" present to be Python2/3-agnostic
-    def __init__(self, f):
-        self.accumulator = 0 # the int building up to a full byte to be written
+    CODES_BITS = 1 << 12 # bits collected by writecodes before writing them
+    BUFFER_SIZE = 1 << 16 # default number of bytes written to the file at a time
+
+    def __init__(self, f, buffer_size=BUFFER_SIZE):
+        self.accumulator = 0 # the int holding the bits not yet in buffer
+                             # (the rightmost bcount bits)
         self.bcount = 0 # number of bits put in the accumulator so far
+        self.buffer = bytearray() # full bytes not yet written to file
+        self.buffer_size = buffer_size # write buffer when it has this many bytes
         self.output = f # the file object we are writing to
                         # (must be opened in binary mode)
 
@@ -48,38 +65,79 @@ class BitWriter(object): # "(object)" present to be Python2/3-agnostic
         self.output.close()
         
     def writebit(self, bit):
-        # if a full byte has accumulated, write it out to file
-        # and reset accumulater to all 0's:
-        if self.bcount == 8:
-            self.flush()
         # add the new bit to the accumulator:
-        if bit > 0:
-            self.accumulator |= 1 << 7-self.bcount
+        self.accumulator = self.accumulator << 1 | (bit > 0)
         self.bcount += 1
- 
-    def _writebits(self, bits, n):
-        while n > 0:
-            self.writebit(bits & 1 << n-1)
-            n -= 1
- 
+        # if a full byte has accumulated, write it out to file:
+        if self.bcount == 8:
+            self._writebytes()
+
+    def writebits(self, bits, n):
+        # add the rightmost n bits of `bits` to the accumulator at once:
+        self.accumulator = self.accumulator << n | bits & (1 << n) - 1
+        self.bcount += n
+        if self.bcount >= 8:
+            self._writebytes()
+
+    _writebits = writebits # name used before writebits existed
+
+    def writecodes(self, codes):
+        # Writes a sequence of (code, length) pairs, where each code is
+        # an int of `length` bits (like the codes of a Huffman table).
+        acc, bcount = self.accumulator, self.bcount
+        for code, length in codes:
+            acc = acc << length | code
+            bcount += length
+            if bcount >= self.CODES_BITS:
+                # keep the accumulator (and the shifts) small
+                self.accumulator, self.bcount = acc, bcount
+                self._writebytes()
+                acc, bcount = self.accumulator, self.bcount
+        self.accumulator, self.bcount = acc, bcount
+        if bcount >= 8:
+            self._writebytes()
+
     def writeint32bits(self, intvalue):
-        self._writebits(intvalue, 32)
+        self.writebits(intvalue, 32)
+
+    def _writebytes(self):
+        # Moves all full bytes of the accumulator to buffer,
+        # keeping the last (up to 7) bits.
+        rest = self.bcount & 7
+        self.buffer += (self.accumulator >> rest).to_bytes(self.bcount >> 3, "big")
+        self.accumulator &= (1 << rest) - 1
+        self.bcount = rest
+        if len(self.buffer) >= self.buffer_size:
+            self._writebuffer()
+
+    def _writebuffer(self):
+        # Writes buffer to file, and empties it.
+        if self.buffer:
+            self.output.write(self.buffer)
+            self.buffer.clear()
 
     def flush(self):
-        # Writes current accumulator to file, then
-        # resets accumulator to all 0's.
+        # Writes current accumulator to buffer, right-filled with 0's
+        # to a full byte, then resets accumulator to all 0's.
+        # Finally writes buffer to file.
 
         if self.bcount: # but only if any bits have accumulated
-            self.output.write(bytearray([self.accumulator]))
+            self.buffer.append(self.accumulator << 8 - self.bcount)
             self.accumulator = 0
             self.bcount = 0
+        self._writebuffer()
  
 class BitReader(object): # "(object)" present to be Python2/3-agnostic
+    READ_SIZE = 1 << 16 # bytes read from the file at a time
+
     def __init__(self, f):
         self.input = f # the file object we are reading from
                        # (must be opened in binary mode)
-        self.accumulator = 0 # cache of the last byte read
+        self.buffer = b"" # the last chunk read from the file
+        self.pos = 0 # position of the next byte to use in buffer
+        self.accumulator = 0 # cache of the bytes taken from buffer
         self.bcount = 0 # number of bits left unread in accumulator
+                        # (the rightmost bcount bits)
         self.read = 0 # Was last read succesful? [EOF or not?]
  
     def __enter__(self):
@@ -95,24 +153,92 @@ class BitReader(object): # "(object)" present to be Python2/3-agnostic
         return self.read
     
     def readbit(self):
-        if not self.bcount: # if bcount == 0 [no unread bits in accumulator]
-            a = self.input.read(1)
-            if a: # if not EOF [EOF = attempt at reading returns empty list]
-                self.accumulator = ord(a) # int between 0 and 256, [note that
-                                          # ord works for byte objects]
-            self.bcount = 8 # number of bits available
-            self.read = len(a) # remember number of bytes read (0 => EOF)
-        # extract the (bcount-1)'th bit [the next bit] in the accumulator:
-        rv = (self.accumulator & (1 << self.bcount-1)) >> self.bcount-1
+        # if bcount == 0 [no unread bits in accumulator], refill it;
+        # at EOF the bit is 0 and readsucces() is false:
+        if not self.bcount and not self._fill(1):
+            self.read = 0
+            return 0
         self.bcount -= 1 # move to next bit in accumulator
-        return rv
- 
-    def _readbits(self, n):
-        v = 0
-        while n > 0:
-            v = (v << 1) | self.readbit()
-            n -= 1
+        # extract the bcount'th bit [the next bit] in the accumulator:
+        return self.accumulator >> self.bcount & 1
+
+    def readbits(self, n):
+        # Reads the next n bits as an int; at EOF the missing bits are 0's
+        # and readsucces() is false.
+        v = self.peekbits(n)
+        self.read = self.bcount >= n
+        self.bcount = max(self.bcount - n, 0)
         return v
 
+    _readbits = readbits # name used before readbits existed
+
+    def peekbits(self, n):
+        # Returns the next n bits without reading them.
+        if self.bcount < n and not self._fill(n):
+            # fewer than n bits left, right-fill with 0's
+            return (self.accumulator & (1 << self.bcount) - 1) << n - self.bcount
+        return self.accumulator >> self.bcount - n & (1 << n) - 1
+
     def readint32bits(self):
-        return self._readbits(32)
\ No newline at end of file
+        return self.readbits(32)
+
+    def alignbyte(self):
+        # Skips the unread bits of the current byte, e.g. padding.
+        self.bcount &= ~7
+
+    def _fill(self, n):
+        # Moves bytes from the buffer to the accumulator until at least
+        # n bits are unread, at least 64 bits at a time, reading a new
+        # chunk from the file when needed. Returns false at EOF.
+        while self.bcount < n:
+            if self.pos == len(self.buffer) and not self._readbuffer():
+                return False
+            k = min(max(8, n - self.bcount + 7 >> 3), len(self.buffer) - self.pos)
+            self.accumulator = ((self.accumulator & (1 << self.bcount) - 1) << 8 * k
+                                | int.from_bytes(self.buffer[self.pos:self.pos + k], "big"))
+            self.pos += k
+            self.bcount += 8 * k
+            self.read = 1
+        return True
+
+    def _readbuffer(self):
+        # Reads the next chunk of the file into buffer.
+        # Returns false at EOF.
+        self.buffer = self.input.read(self.READ_SIZE)
+        self.pos = 0
+        return len(self.buffer) > 0
+
+class BufferBitReader(BitReader):
+    # A BitReader reading straight from a buffer (anything with the buffer
+    # protocol) instead of a file, e.g. an mmap of a file, without copying it.
+    # The bit position can be told and set (tellbit, seekbit), so several
+    # readers can share one buffer, each reading from its own position.
+
+    def __init__(self, buffer, bitpos=0):
+        BitReader.__init__(self, None)
+        self.buffer = memoryview(buffer).cast("B") # bytes of the buffer
+        self.seekbit(bitpos)
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        # Releases the view of the buffer, the buffer itself stays open
+        # (an mmap can only be closed when no views of it are left).
+        self.buffer.release()
+
+    def tellbit(self):
+        # Position of the next bit to read.
+        return 8 * self.pos - self.bcount
+
+    def seekbit(self, bitpos):
+        # Moves to bit bitpos of the buffer, counted from its first bit.
+        self.pos = min(bitpos >> 3, len(self.buffer))
+        self.accumulator = 0
+        self.bcount = 0
+        if bitpos & 7 and self._fill(8):
+            self.bcount -= bitpos & 7
+
+    def _readbuffer(self):
+        # The whole buffer is available, there is nothing more to read.
+        return False
@@ -1,27 +1,50 @@
 import numpy as np
 from numpy import linalg as la
+from array import array
+
+try:
+    import scipy.sparse as sp
+    from scipy.sparse import linalg as spla
+except ImportError:
+    # SciPy is optional, graphs are always dense without it
+    sp = None
 
 
 np.set_printoptions(precision=3)
 
+READ_SIZE = 1 << 20 # characters read from a data file at a time
+
 
 
 class DiGraph:
     """A class for representing directed graphs via their adjacency matrices.
 
     Attributes:
-        (fill this out after completing DiGraph.__init__().)
+        A_hat ((n,n) ndarray or sparse matrix): the adjacency matrix with
+            columns normalized to sum to 1. Dense graphs have no sinks,
+            as sinks are made to link to every node. Sparse matrices are
+            CSR, or CSC once the graph has been changed by add_edges() or
+            remove_edges(), or solved by pushsolve(), as they use columns.
+        dangling ((n,) ndarray or None): for sparse graphs, which nodes
+            are sinks. Their columns of A_hat are zero, and their links to
+            every node are added when multiplying, see _matvec().
+        labels (list(str)): labels for the n nodes in the graph.
+        info (dict): the method, number of iterations and L1 residual of
+            the last iterative solve, or None before any.
     """
     # Problem 1
-    def __init__(self, A, labels=None):
+    def __init__(self, A, labels=None, sparse=None):
         """Modify A so that there are no sinks in the corresponding graph,
         then calculate Ahat. Save Ahat and the labels as attributes.
 
         Parameters:
-            A ((n,n) ndarray): the adjacency matrix of a directed graph.
-                A[i,j] is the weight of the edge from node j to node i.
+            A ((n,n) ndarray or sparse matrix): the adjacency matrix of
+                a directed graph. A[i,j] is the weight of the edge from
+                node j to node i.
             labels (list(str)): labels for the n nodes in the graph.
-                If None, defaults to [0, 1, ..., n-1].                
+                If None, defaults to [0, 1, ..., n-1].
+            sparse (bool): whether to store A_hat as a sparse (CSR) matrix,
+                which needs SciPy. If None, A_hat is sparse if A is.
 
         Examples
         ========
@@ -43,6 +66,9 @@ class DiGraph:
         {'a': 0.096, 'b': 0.274, 'c': 0.356, 'd': 0.274}
         >>> get_ranks(steady_state_3)
         ['c', 'b', 'd', 'a']
+        >>> G = DiGraph(A, labels=['a','b','c','d'], sparse=True)
+        >>> get_ranks(G.linsolve()), get_ranks(G.eigensolve()), get_ranks(G.itersolve())
+        (['c', 'b', 'd', 'a'], ['c', 'b', 'd', 'a'], ['c', 'b', 'd', 'a'])
         """
         # Checking if A is actually square
         if len(A.shape) == 1:
@@ -50,19 +76,243 @@ class DiGraph:
         elif A.shape[0] != A.shape[1]:
             raise TypeError("W is not square")
 
-        # Calculating A_hat by first fixing sinks and then transforming that matrix to A_hat.
-        A_tilde = np.where(np.sum(A, axis=0) == 0, 1, A)
-        self.A_hat = np.where(A_tilde, A_tilde/np.sum(A_tilde, axis = 0), A_tilde)
+        if sparse is None:
+            sparse = sp is not None and sp.issparse(A)
+
+        if sparse:
+            if sp is None:
+                raise ImportError("sparse graphs need SciPy")
+            # Sinks are kept as zero columns, and only marked as dangling,
+            #   such that A_hat keeps the sparsity of A
+            A = sp.csr_matrix(A, dtype=float)
+            self._col_sums = col_sums = np.asarray(A.sum(axis=0)).ravel()
+            self.dangling = col_sums == 0
+            scale = np.divide(1, col_sums, out=np.zeros(len(col_sums)), where=~self.dangling)
+            self.A_hat = (A @ sp.diags(scale)).tocsr()
+        else:
+            if sp is not None and sp.issparse(A):
+                A = A.toarray()
+            # Column sums of A are kept, to renormalize changed columns
+            self._col_sums = np.sum(A, axis=0, dtype=float)
+            # Calculating A_hat by first fixing sinks and then transforming that matrix to A_hat.
+            A_tilde = np.where(np.sum(A, axis=0) == 0, 1, A)
+            self.A_hat = np.where(A_tilde, A_tilde/np.sum(A_tilde, axis = 0), A_tilde)
+            self.dangling = None
 
         # Raise exception if not enough or too many labels
         # Labels are mapped to strings to assure this property,
         #   this also makes it possible to parse whatever iterable - eg. a set
         if labels:
-            if len(labels) != len(A):
+            if len(labels) != A.shape[0]:
                 raise ValueError("number of labels is not equal to the number of nodes in the graph")
             self.labels = [*map(str, labels)]
         else:
-            self.labels = [*map(str, range(len(A)))]
+            self.labels = [*map(str, range(A.shape[0]))]
+
+        self.info = None
+        # The last solution of an iterative solve, its residual vector and
+        #   damping factor, which are kept up to date by add_edges() and
+        #   remove_edges(), such that pushsolve() can refine the solution
+        self._x = self._r = self._epsilon = None
+        # Dict for looking up the index of a label, see _indices()
+        self._lookup = None
+
+
+    def _matvec(self, x, out=None):
+        """Compute A_hat @ x, where sinks link to every node, for a vector
+        or an (n,k) matrix x. Sinks of sparse graphs add the rank-one term
+        (1/n) * ones * (x at sinks), instead of being stored densely.
+        The result is written to out, if given.
+        """
+        if self.dangling is None:
+            return np.matmul(self.A_hat, x, out=out)
+        if out is None:
+            out = self.A_hat @ x
+        else:
+            out[...] = self.A_hat @ x
+        out += x[self.dangling].sum(axis=0) / len(x)
+        return out
+
+
+    def _dense(self):
+        """Return A_hat as a dense matrix where sinks link to every node."""
+        if self.dangling is None:
+            return self.A_hat
+        A_hat = self.A_hat.toarray()
+        A_hat[:, self.dangling] = 1 / len(A_hat)
+        return A_hat
+
+
+    def _diagonal(self):
+        """Return the diagonal of A_hat, where sinks link to every node."""
+        if self.dangling is None:
+            return np.diag(self.A_hat).copy()
+        return self.A_hat.diagonal() + self.dangling / len(self.dangling)
+
+
+    def _start(self, x0):
+        """Return the starting vector of an iterative solver, the uniform
+        vector, or x0 normalized to sum to 1. x0 is an array, or a dict
+        like the solvers return, where missing labels start at 0.
+        """
+        n = len(self.labels)
+        if x0 is None:
+            return np.full(n, 1/n)
+        if isinstance(x0, dict):
+            x = np.array([x0.get(label, 0) for label in self.labels], dtype=float)
+        else:
+            x = np.array(x0, dtype=float)
+        if x.shape != (n,) or not x.sum() > 0:
+            raise ValueError("x0 must have a value for each node, with a positive sum")
+        return x / x.sum()
+
+
+    def _residual(self, x, epsilon):
+        """Return the residual vector epsilon*A_hat@x + (1-epsilon)/n - x
+        of the linear system, which is 0 for the PageRank vector x.
+        """
+        r = epsilon * self._matvec(x)
+        r += (1-epsilon)/len(x) - x
+        return r
+
+
+    def _finish(self, method, x, epsilon, iterations, r=None):
+        """Record info of an iterative solve, and keep x and its residual
+        vector r for pushsolve(). Return the dictionary of x, normalized
+        to sum to 1 first, unless r is given.
+        """
+        if r is None:
+            x = x / x.sum()
+            r = self._residual(x, epsilon)
+        self._x, self._r, self._epsilon = x, r, epsilon
+        self.info = {"method": method, "iterations": iterations,
+                     "residual": float(np.abs(r).sum())}
+        return _ret_dict(self.labels, x)
+
+
+    def _columns(self, J, v):
+        """Compute A_hat[:,J] @ v, where sinks link to every node,
+        touching only the columns J.
+        """
+        if self.dangling is None:
+            return self.A_hat[:, J] @ v
+        return self.A_hat[:, J] @ v + v[self.dangling[J]].sum() / len(self.labels)
+
+
+    def _columnwise(self):
+        """Store a sparse A_hat as CSC, where columns are cheap to take."""
+        if self.dangling is not None and self.A_hat.format != "csc":
+            self.A_hat = self.A_hat.tocsc()
+
+
+    def _splice(self, J, B):
+        """Replace the columns J (sorted) of the CSC matrix A_hat by the
+        columns of the CSC matrix B, copying the runs of columns between
+        them at once.
+        """
+        A = self.A_hat
+        n = A.shape[1]
+        counts = np.diff(A.indptr)
+        counts[J] = np.diff(B.indptr)
+        indptr = np.concatenate(([0], np.cumsum(counts)))
+        data = np.empty(indptr[-1])
+        indices = np.empty(indptr[-1], dtype=A.indices.dtype)
+
+        start = 0
+        for k, j in enumerate([*J, n]):
+            # The columns start to j-1 of A, then column k of B
+            a, b, p = A.indptr[start], A.indptr[j], indptr[start]
+            data[p:p + b - a], indices[p:p + b - a] = A.data[a:b], A.indices[a:b]
+            if j < n:
+                a, b, p = B.indptr[k], B.indptr[k + 1], indptr[j]
+                data[p:p + b - a], indices[p:p + b - a] = B.data[a:b], B.indices[a:b]
+            start = j + 1
+        self.A_hat = sp.csc_matrix((data, indices, indptr), shape=A.shape)
+
+
+    def _indices(self, labels, grow=False):
+        """Return the indices of the nodes with the given labels. Labels
+        not in the graph are added as new nodes without edges if grow is
+        True, and raise a KeyError otherwise.
+        """
+        if self._lookup is None:
+            self._lookup = {label: i for i, label in enumerate(self.labels)}
+        labels = [*map(str, labels)]
+        if grow:
+            new = [*dict.fromkeys(label for label in labels if label not in self._lookup)]
+            if new:
+                self._grow(new)
+        return np.array([self._lookup[label] for label in labels], dtype=np.intp)
+
+
+    def _grow(self, labels):
+        """Add nodes without edges (sinks) with the given new labels.
+        The teleport and sink terms change by the same amount for every
+        old node, so the kept residual is updated without a product.
+        """
+        n, k = len(self.labels), len(labels)
+        sinks = self._col_sums == 0
+        if self._x is not None:
+            # The uniform part of (1-epsilon)/n + epsilon*A_hat@x
+            s = 1 - self._epsilon + self._epsilon * self._x[sinks].sum()
+            self._r = np.concatenate((self._r + s/(n+k) - s/n, np.full(k, s/(n+k))))
+            self._x = np.concatenate((self._x, np.zeros(k)))
+
+        self._lookup.update(zip(labels, range(n, n + k)))
+        self.labels += labels
+        self._col_sums = np.concatenate((self._col_sums, np.zeros(k)))
+        if self.dangling is None:
+            A_hat = np.zeros((n + k, n + k))
+            A_hat[:n, :n] = self.A_hat
+            A_hat[:, self._col_sums == 0] = 1 / (n + k)
+            self.A_hat = A_hat
+        else:
+            self.A_hat.resize((n + k, n + k))
+            self.dangling = np.concatenate((self.dangling, np.ones(k, dtype=bool)))
+
+
+    def _reweight(self, rows, cols, weights, remove=False):
+        """Add weights to the edges from cols to rows, or remove those
+        edges, renormalizing only the changed columns of A_hat. The kept
+        residual changes by epsilon*(A_hat_new - A_hat_old)[:,J] @ x[J],
+        for the changed columns J.
+        """
+        self._columnwise()
+        n = len(self.labels)
+        J, k = np.unique(cols, return_inverse=True)
+        if self._x is not None:
+            x_J = self._x[J]
+            before = self._columns(J, x_J)
+
+        # The columns of A, from the columns of A_hat and their sums
+        old_sums = self._col_sums[J]
+        if self.dangling is None:
+            A = self.A_hat[:, J] * old_sums
+            if remove:
+                A[rows, k] = 0
+            else:
+                np.add.at(A, (rows, k), weights)
+            sums = A.sum(axis=0)
+            self.A_hat[:, J] = np.where(sums != 0, A / np.where(sums != 0, sums, 1), 1/n)
+        else:
+            A = self.A_hat[:, J] @ sp.diags(old_sums)
+            D = sp.csc_matrix((weights, (rows, k)), shape=A.shape)
+            if remove:
+                # Subtracting the entries themselves makes them exactly 0
+                D.data[:] = 1
+                A = A - A.multiply(D)
+            else:
+                A = A + D
+            sums = np.asarray(A.sum(axis=0)).ravel()
+            scale = np.divide(1, sums, out=np.zeros(len(sums)), where=sums != 0)
+            A = (A @ sp.diags(scale)).tocsc()
+            A.eliminate_zeros()
+            self._splice(J, A)
+            self.dangling[J] = sums == 0
+        self._col_sums[J] = sums
+
+        if self._x is not None:
+            self._r += self._epsilon * (self._columns(J, x_J) - before)
 
 
     def linsolve(self, epsilon=0.85):
@@ -75,7 +325,13 @@ class DiGraph:
             dict(str -> float): A dictionary mapping labels to PageRank values.
         """
         # Extract n of nxn matrix
-        n = len(self.A_hat)
+        n = self.A_hat.shape[0]
+        if self.dangling is not None:
+            # The teleport and sink terms only scale the solution, as x sums
+            #   to 1, so solve (I - epsilon*A_hat)y = 1 sparsely and normalize
+            A = (sp.identity(n) - epsilon * self.A_hat).tocsc()
+            y = np.atleast_1d(spla.spsolve(A, np.ones(n)))
+            return _ret_dict(self.labels, y / y.sum())
         # Calculating left side of equation
         A = np.identity(n) - epsilon * self.A_hat
         # Calculating right side of equation
@@ -95,9 +351,15 @@ class DiGraph:
             dict(str -> float): A dictionary mapping labels to PageRank values.
         """
         # nxn matrix length extraction
-        n = len(self.A_hat)
+        n = self.A_hat.shape[0]
+        if self.dangling is not None and n > 2:
+            # Largest eigenvector of the Google matrix, by its products only
+            A_line = spla.LinearOperator((n, n), dtype=float,
+                matvec=lambda x: epsilon * self._matvec(x) + (1-epsilon)/n * x.sum(axis=0))
+            eig_v = np.abs(spla.eigs(A_line, k=1, which="LM", v0=np.ones(n))[1][:, 0])
+            return _ret_dict(self.labels, eig_v/la.norm(eig_v, 1))
         # Calculating A_line
-        A_line = epsilon * self.A_hat + (1-epsilon)/n * np.ones((n, n))
+        A_line = epsilon * self._dense() + (1-epsilon)/n * np.ones((n, n))
         # Eigenvalues of A_line
         eig = la.eig(A_line)
         # Picking the eigenvector with eigenvalue 1
@@ -106,31 +368,414 @@ class DiGraph:
         return _ret_dict(self.labels, eig_v/la.norm(eig_v, 1))
 
 
-    def itersolve(self, epsilon=0.85, maxiter=100, tol=1e-12):
+    def itersolve(self, epsilon=0.85, maxiter=100, tol=1e-12, x0=None, extrapolate=None, period=10):
         """Compute the PageRank vector using the iterative method.
 
         Parameters:
             epsilon (float): the damping factor, between 0 and 1.
             maxiter (int): the maximum number of iterations to compute.
             tol (float): the convergence tolerance.
+            x0 (ndarray or dict(str -> float)): the starting vector, e.g.
+                the result of an earlier solve (a warm start), see _start().
+            extrapolate (str): if "aitken" or "quadratic", every period
+                iterations the limit is extrapolated from the last 3 or 4
+                iterates (Aitken's delta-squared, or quadratic extrapolation
+                as by Kamvar et al.), which removes the slowest components
+                of the error. The extrapolation is only used if it lowers
+                the residual.
+            period (int): iterations between extrapolations.
 
         Return:
             dict(str -> float): A dictionary mapping labels to PageRank values.
+
+        Examples
+        ========
+        >>> G = DiGraph(np.array([[0, 0, 0, 0],[1, 0, 1, 0],[1, 0, 0, 1],[1, 0, 1, 0]]))
+        >>> x = G.itersolve(tol=1e-10); cold = G.info["iterations"]
+        >>> _ = G.itersolve(tol=1e-10, x0=x); G.info["iterations"] < cold
+        True
+        >>> get_ranks(G.itersolve(extrapolate="quadratic")) == get_ranks(x)
+        True
         """
-        # Init vector x
-        n = len(self.A_hat)
-        x = np.array([1/n for _ in range(n)])
+        if extrapolate not in (None, "aitken", "quadratic"):
+            raise ValueError("extrapolate must be None, 'aitken' or 'quadratic'")
+
+        # Init vector x, and buffers reused by every iteration
+        n = self.A_hat.shape[0]
+        x = self._start(x0)
+        x_t = np.empty(n)
+        diff = np.empty(n)
+        history = [] # last iterates, for extrapolation
 
         # Do interation until t > maxiter, therefore, range maxiter + 1 -- causes t = maxiter + 1
-        for _ in range(maxiter + 1):
-            x_t = (epsilon*self.A_hat + (1-epsilon)*1/n*np.ones((n, n))) @ x
-            x_t = x_t/la.norm(x_t)
-            if la.norm(x_t - x, 1) < tol:
-                x=x_t
+        for t in range(1, maxiter + 2):
+            # x_t = (epsilon*A_hat + (1-epsilon)/n*ones) @ x, where the
+            #   product with the matrix of ones is the scalar sum(x)
+            self._matvec(x, out=x_t)
+            x_t *= epsilon
+            x_t += (1-epsilon)/n * x.sum()
+            # L1 normalization, all entries are positive
+            x_t /= x_t.sum()
+            # Convergence of the rank vector, in the L1 norm
+            np.subtract(x_t, x, out=diff)
+            x, x_t = x_t, x
+            if np.abs(diff, out=diff).sum() < tol:
+                break
+
+            if extrapolate:
+                history.append(x.copy())
+                del history[:-4]
+                if t % period == 0 and len(history) >= (3 if extrapolate == "aitken" else 4):
+                    x_e = _aitken(*history[-3:]) if extrapolate == "aitken" else _quadratic(*history)
+                    # Only kept if it is closer to a solution, as it may overshoot
+                    if np.abs(self._residual(x_e, epsilon)).sum() < np.abs(self._residual(x, epsilon)).sum():
+                        x[...] = x_e
+                    history.clear()
+
+        return self._finish("itersolve", x, epsilon, t)
+
+
+    def jacobisolve(self, epsilon=0.85, maxiter=100, tol=1e-12, x0=None):
+        """Compute the PageRank vector with Jacobi iteration on the linear
+        system (I - epsilon*A_hat)x = (1-epsilon)/n * ones, whose solution
+        sums to 1. Unlike itersolve, the diagonal (self links) is solved for.
+        Each iterate is normalized to sum to 1, which removes the error
+        along the solution itself.
+
+        Parameters:
+            epsilon (float): the damping factor, between 0 and 1.
+            maxiter (int): the maximum number of iterations to compute.
+            tol (float): the convergence tolerance, of the change in x.
+            x0 (ndarray or dict(str -> float)): the starting vector.
+
+        Return:
+            dict(str -> float): A dictionary mapping labels to PageRank values.
+
+        Examples
+        ========
+        >>> G = DiGraph(np.array([[0, 0, 0, 0],[1, 0, 1, 0],[1, 0, 0, 1],[1, 0, 1, 0]]))
+        >>> get_ranks(G.jacobisolve())
+        ['2', '1', '3', '0']
+        """
+        n = self.A_hat.shape[0]
+        b = (1-epsilon)/n
+        d = epsilon * self._diagonal()
+        x = self._start(x0)
+        x_t = np.empty(n)
+        t = 0 # iterations done, none if maxiter is 0
+
+        for t in range(1, maxiter + 1):
+            # x_t = (b + epsilon*(A_hat - D)x) / (1 - epsilon*D)
+            self._matvec(x, out=x_t)
+            x_t *= epsilon
+            x_t += b - d*x
+            x_t /= 1 - d
+            x_t /= x_t.sum()
+            change = np.abs(x_t - x).sum()
+            x, x_t = x_t, x
+            if change < tol:
+                break
+
+        return self._finish("jacobisolve", x, epsilon, t)
+
+
+    def gssolve(self, epsilon=0.85, maxiter=100, tol=1e-12, x0=None):
+        """Compute the PageRank vector with Gauss-Seidel sweeps on the
+        linear system of jacobisolve(), where each node is updated in turn,
+        using the values already updated in the sweep. A sweep solves the
+        lower triangular part of the system, with SciPy; links from sinks
+        of sparse graphs use the values of the previous sweep. Each iterate
+        is normalized to sum to 1, like in jacobisolve().
+
+        Parameters:
+            epsilon (float): the damping factor, between 0 and 1.
+            maxiter (int): the maximum number of sweeps to compute.
+            tol (float): the convergence tolerance, of the change in x.
+            x0 (ndarray or dict(str -> float)): the starting vector.
+
+        Return:
+            dict(str -> float): A dictionary mapping labels to PageRank values.
+
+        Examples
+        ========
+        >>> G = DiGraph(np.array([[0, 0, 0, 0],[1, 0, 1, 0],[1, 0, 0, 1],[1, 0, 1, 0]]))
+        >>> get_ranks(G.gssolve())
+        ['2', '1', '3', '0']
+        """
+        n = self.A_hat.shape[0]
+        b = (1-epsilon)/n
+        x = self._start(x0)
+        t = 0 # sweeps done, none if maxiter is 0
+
+        if sp is None:
+            # Without SciPy, the graph is dense, and nodes are updated one by one
+            d = epsilon * self._diagonal()
+            for t in range(1, maxiter + 1):
+                x_old = x.copy()
+                for i in range(n):
+                    x[i] = (b + epsilon*(self.A_hat[i] @ x) - d[i]*x[i]) / (1 - d[i])
+                x /= x.sum()
+                if np.abs(x - x_old).sum() < tol:
+                    break
+            return self._finish("gssolve", x, epsilon, t)
+
+        # I - epsilon*A_hat = L + U, lower triangular L and strictly upper U
+        M = sp.identity(n, format="csr") - epsilon * sp.csr_matrix(self.A_hat)
+        L, U = sp.tril(M, format="csr"), sp.triu(M, 1, format="csr")
+
+        for t in range(1, maxiter + 1):
+            # Solve L x_t = b - U x (+ links from sinks)
+            rhs = b - U @ x
+            if self.dangling is not None:
+                rhs += epsilon * x[self.dangling].sum() / n
+            x_t = spla.spsolve_triangular(L, rhs, lower=True)
+            x_t /= x_t.sum()
+            change = np.abs(x_t - x).sum()
+            x = x_t
+            if change < tol:
                 break
-            x=x_t
-        return _ret_dict(self.labels, x/la.norm(x, 1))
 
+        return self._finish("gssolve", x, epsilon, t)
+
+
+    def add_edges(self, edges, weights=None):
+        """Add edges to the graph, renormalizing only the columns of
+        A_hat of their sources. Labels not in the graph are added as new
+        nodes. The last solution is kept up to date, for pushsolve().
+
+        Parameters:
+            edges (iterable((str, str))): the (source, target) labels of
+                the edges. Edges already in the graph gain weight.
+            weights (iterable(float)): the weight of each edge.
+                If None, every edge has weight 1.
+
+        Examples
+        ========
+        >>> G = DiGraph(np.array([[0, 0, 0, 0],[1, 0, 1, 0],[1, 0, 0, 1],[1, 0, 1, 0]]))
+        >>> _ = G.itersolve()
+        >>> G.add_edges([('1', '0'), ('1', '4')])
+        >>> G.A_hat[:, 1]
+        array([0.5, 0. , 0. , 0. , 0.5])
+        >>> get_ranks(G.pushsolve()) == get_ranks(G.itersolve())
+        True
+        """
+        edges = [*edges]
+        if not edges:
+            return
+        weights = np.ones(len(edges)) if weights is None else np.array([*weights], dtype=float)
+        if len(weights) != len(edges):
+            raise ValueError("number of weights is not equal to the number of edges")
+        sources, targets = zip(*edges)
+        cols = self._indices(sources, grow=True)
+        rows = self._indices(targets, grow=True)
+        self._reweight(rows, cols, weights)
+
+
+    def remove_edges(self, edges):
+        """Remove edges from the graph, whatever their weight, see
+        add_edges(). Nodes left without links become sinks.
+
+        Parameters:
+            edges (iterable((str, str))): the (source, target) labels of
+                the edges. Edges not in the graph are ignored, but
+                labels not in the graph raise a KeyError.
+
+        Examples
+        ========
+        >>> G = DiGraph(np.array([[0, 0, 0, 0],[1, 0, 1, 0],[1, 0, 0, 1],[1, 0, 1, 0]]))
+        >>> G.remove_edges([('3', '2')])
+        >>> G.A_hat[:, 3]
+        array([0.25, 0.25, 0.25, 0.25])
+        """
+        edges = [*edges]
+        if not edges:
+            return
+        sources, targets = zip(*edges)
+        self._reweight(self._indices(targets), self._indices(sources), np.ones(len(edges)), remove=True)
+
+
+    def pushsolve(self, epsilon=0.85, maxiter=10000, tol=1e-12, x0=None, theta=0.01):
+        """Compute the PageRank vector by pushing residuals (Gauss-Southwell),
+        starting from the last solution, such that after add_edges() or
+        remove_edges() only the nodes near the changes are updated.
+        Each step adds the residual of the nodes with the largest residuals
+        to their values, which pushes epsilon times it along their links.
+        Only those columns of A_hat are used, unless many nodes are pushed.
+
+        Parameters:
+            epsilon (float): the damping factor, between 0 and 1.
+            maxiter (int): the maximum number of steps to compute.
+            tol (float): the convergence tolerance, of the L1 residual.
+            x0 (ndarray or dict(str -> float)): the starting vector. If None,
+                the last solution, whose residual is kept if its damping
+                factor is epsilon; otherwise the uniform vector.
+            theta (float): the nodes pushed in a step are those with a
+                residual of at least theta times the largest. If these are
+                more than n/16 nodes, every node is pushed.
+
+        Return:
+            dict(str -> float): A dictionary mapping labels to PageRank values.
+
+        Examples
+        ========
+        >>> G = DiGraph(np.array([[0, 0, 0, 0],[1, 0, 1, 0],[1, 0, 0, 1],[1, 0, 1, 0]]))
+        >>> get_ranks(G.pushsolve())
+        ['2', '1', '3', '0']
+        """
+        self._columnwise()
+        if x0 is None and self._x is not None and self._epsilon == epsilon:
+            x, r = self._x, self._r
+        else:
+            x = self._start(self._x if x0 is None else x0)
+            r = self._residual(x, epsilon)
+
+        # Links from sinks of sparse graphs add the same to every node, like
+        #   teleports, which only scales the solution. So y = gamma*x solves
+        #   (I - epsilon*A_hat)y = (1-epsilon)/n * ones, without them, with
+        #   residual gamma*r, and pushes from sinks stay local
+        n = len(x)
+        sinks = self.dangling if self.dangling is not None else np.zeros(n, dtype=bool)
+        gamma = (1-epsilon) / (1-epsilon + epsilon * x[sinks].sum())
+        y, r = gamma * x, gamma * r
+
+        t = 0
+        r_abs = np.abs(r)
+        while r_abs.sum() >= gamma * tol / 2 and t < maxiter:
+            S = np.flatnonzero(r_abs >= theta * r_abs.max())
+            if len(S) > n // 16:
+                # Many nodes are pushed, so a product with all of A_hat is
+                #   faster, and then every node is pushed
+                y += r
+                r = epsilon * (self.A_hat @ r)
+            else:
+                dx = r[S]
+                y[S] += dx
+                r[S] = 0
+                r += epsilon * (self.A_hat[:, S] @ dx)
+            np.abs(r, out=r_abs)
+            t += 1
+
+        # Back to x summing to 1, where the terms left out subtract the mean
+        #   of r from the residual, so its L1 norm at most doubles
+        sigma = y.sum()
+        r -= r.sum() / n
+        return self._finish("pushsolve", y / sigma, epsilon, t, r / sigma)
+
+
+    def batchsolve(self, epsilon=0.85, teleports=None, maxiter=100, tol=1e-12):
+        """Compute k PageRank vectors at once with the iterative method, for
+        k damping factors and/or k teleport vectors (personalized PageRank),
+        iterating them together as the columns of an (n,k) matrix, such that
+        each iteration takes one product of A_hat with that matrix.
+        Columns that have converged are left out of later iterations.
+
+        Parameters:
+            epsilon (float or (k,) ndarray): the damping factors, between
+                0 and 1, or one for every vector.
+            teleports ((n,) or (n,k) ndarray): the teleport vectors, where
+                teleports[i,j] is the probability that vector j teleports
+                to node i. Each is normalized to sum to 1. If None, every
+                node is equally likely, as in the other methods.
+            maxiter (int): the maximum number of iterations to compute.
+            tol (float): the convergence tolerance, of each vector.
+
+        Return:
+            dict(str -> (k,) ndarray): A dictionary mapping labels to
+                their k PageRank values.
+
+        Examples
+        ========
+        >>> G = DiGraph(np.array([[0, 0, 0, 0],[1, 0, 1, 0],[1, 0, 0, 1],[1, 0, 1, 0]]), labels='abcd')
+        >>> x = G.batchsolve(epsilon=[0.5, 0.85])
+        >>> get_ranks({k: x[k][1] for k in x}) == get_ranks(G.itersolve())
+        True
+        >>> x = G.batchsolve(teleports=np.eye(4))
+        >>> [get_ranks({k: x[k][j] for k in x})[0] for j in range(4)]
+        ['c', 'b', 'c', 'c']
+        >>> x = G.batchsolve(teleports=np.ones((2, 4)))
+        Traceback (most recent call last):
+            ...
+        ValueError: teleports must be an (n,) or (n,k) array, with a row for each node
+        """
+        n = len(self.labels)
+        epsilon = np.atleast_1d(np.asarray(epsilon, dtype=float))
+        if teleports is None:
+            V = np.full((1, 1), 1/n)
+        else:
+            V = np.array(teleports, dtype=float)
+            if V.ndim == 1:
+                V = V.reshape(-1, 1)
+            if V.ndim != 2 or V.shape[0] != n:
+                raise ValueError("teleports must be an (n,) or (n,k) array, with a row for each node")
+            if not (V.sum(axis=0) > 0).all():
+                raise ValueError("teleport vectors must have positive sums")
+            V /= V.sum(axis=0)
+        k = max(len(epsilon), V.shape[1])
+        if epsilon.ndim != 1 or len(epsilon) not in (1, k) or V.shape[1] not in (1, k):
+            raise ValueError("epsilon and teleports must be given for the same number of vectors")
+        epsilon = np.broadcast_to(epsilon, k)
+
+        # The columns still iterated, their epsilons and teleport terms,
+        #   and a buffer reused by every iteration
+        active = np.arange(k)
+        X = np.empty((n, k))
+        X[...] = V
+        E = epsilon
+        B = (1 - epsilon) * V
+        diff = np.empty_like(X)
+        result = np.empty((n, k))
+        t = 0 # iterations done, none if maxiter is 0
+
+        for t in range(1, maxiter + 1):
+            # Each column x_t = epsilon*A_hat@x + (1-epsilon)*v, as x sums to 1.
+            #   x_t sums to 1 as well, so the columns are only normalized
+            #   at the end, which saves passes over the whole matrix
+            X_t = self._matvec(X)
+            X_t *= E
+            X_t += B
+            np.subtract(X_t, X, out=diff)
+            change = np.abs(diff, out=diff).sum(axis=0)
+            X = X_t
+            converged = change < tol
+            if converged.any():
+                result[:, active[converged]] = X[:, converged]
+                left = ~converged
+                active, X, E = active[left], X[:, left], E[left]
+                if B.shape[1] > 1:
+                    B = B[:, left]
+                if not len(active):
+                    break
+                diff = np.empty_like(X)
+        result[:, active] = X
+        result /= result.sum(axis=0)
+
+        # Residuals of the linear systems, one for each vector
+        R = self._matvec(result) * epsilon + (1 - epsilon) * V - result
+        self.info = {"method": "batchsolve", "iterations": t,
+                     "residual": float(np.abs(R).sum(axis=0).max())}
+        return _ret_dict(self.labels, result)
+
+
+def _aitken(x0, x1, x2):
+    """Aitken's delta-squared extrapolation of three iterates, entrywise,
+    keeping x2 where the second difference vanishes.
+    """
+    d1 = x1 - x0
+    d2 = x2 - 2*x1 + x0
+    x = np.where(np.abs(d2) > 1e-300, x0 - d1**2 / np.where(d2 == 0, 1, d2), x2)
+    x = np.abs(x)
+    return x / x.sum()
+
+def _quadratic(x0, x1, x2, x3):
+    """Quadratic extrapolation of four iterates (Kamvar et al.), assuming
+    x3 is a combination of the three eigenvectors of largest eigenvalues.
+    """
+    Y = np.column_stack((x1 - x0, x2 - x0))
+    g1, g2 = la.lstsq(Y, -(x3 - x0), rcond=None)[0]
+    g3 = 1
+    x = (g1 + g2 + g3)*x1 + (g2 + g3)*x2 + g3*x3
+    x = np.abs(x)
+    return x / x.sum()
 
 def _ret_dict(lab, vec):
         return {k:v for k, v in zip(lab, vec)}
@@ -173,15 +818,8 @@ def rank_websites(filename="web_stanford.txt", epsilon=0.85):
     >>> print(rank_websites()[0:5])
     ['98595', '32791', '28392', '77323', '92715']
     """
-    # Read data file
-    # Pre: Keys are only listed once
-    dictLab = {}
-    with open(filename, "r") as input_file:
-        for line in input_file.readlines():
-            a = line.strip('\n').split('/')
-            dictLab[a.pop(0)] = a
-
-    return _do_calc(dictLab, epsilon)
+    # Read data file, lines of a webpage listed more than once are all used
+    return _do_calc(*_read_edges(filename, _web_edges), epsilon)
 
 # Task 3
 def rank_uefa_teams(filename, epsilon=0.85):
@@ -207,44 +845,88 @@ def rank_uefa_teams(filename, epsilon=0.85):
     ['Liverpool', 'Ath Madrid', 'Paris SG', 'Genk', 'Barcelona']
     """
     # Read data file
-    dictLab = {}
+    return _do_calc(*_read_edges(filename, _uefa_edges), epsilon)
+
+
+def _read_edges(filename, parse):
+    """Read the edges of a graph from a data file, READ_SIZE characters
+    at a time, such that only the edges are kept, as integer ids.
+
+    Parameters:
+        filename (str): the file to read from.
+        parse (function): given a list of lines of the file and intern,
+            returns the ids of the sources and targets of their edges.
+            intern(labels) returns the ids of a list of labels, where
+            each new label gets the next id.
+
+    Returns:
+        (list(str)): the labels, in order of their ids.
+        ((m,) ndarray): the ids of the sources of the m edges.
+        ((m,) ndarray): the ids of the targets of the m edges.
+    """
+    lookup = {}
+    def intern(labels):
+        return np.array([lookup.setdefault(label, len(lookup)) for label in labels], dtype=np.int32)
+
+    # Ids are kept in compact arrays, growing by a chunk at a time
+    sources, targets = array("i"), array("i")
+    rest = ""
     with open(filename, "r") as input_file:
-        for line in input_file.readlines():
-            home_team, away_team, home_goals, away_goals = line.strip('\n').split(',')
-            # Home team lost
-            if home_goals < away_goals:
-                # Key exists -> append
-                if dictLab.get(home_team, 0):
-                    dictLab[home_team].append(away_team)
-                # Create key with corresponding list
-                else:
-                    dictLab[home_team] = [away_team]
-            # **Symmetric to above ^**
-            elif home_goals > away_goals:
-                if dictLab.get(away_team, 0):
-                    dictLab[away_team].append(home_team)
-                else:
-                    dictLab[away_team] = [home_team]
-    
-    return _do_calc(dictLab, epsilon)
-
-
-def _do_calc(dictLab, epsilon):
-    # If not all pages link to others
-    allID = set(dictLab).union(*dictLab.values())
-    nIDs = len(allID)
-
-    # Dict for looking up index in array
-    lookup = {k:v for k, v in zip(allID, range(nIDs))}
-
-    # Making the adjacency matrix
-    adj = np.zeros((nIDs, nIDs))
-    for k in dictLab:
-        for v in dictLab[k]:
-            adj[lookup.get(v), lookup.get(k)] += 1
+        while True:
+            chunk = input_file.read(READ_SIZE)
+            if not chunk:
+                break
+            # The last line may continue in the next chunk
+            lines = (rest + chunk).split("\n")
+            rest = lines.pop()
+            if lines:
+                s, t = parse(lines, intern)
+                sources.frombytes(s.tobytes())
+                targets.frombytes(t.tobytes())
+    if rest:
+        s, t = parse([rest], intern)
+        sources.frombytes(s.tobytes())
+        targets.frombytes(t.tobytes())
+
+    return [*lookup], np.frombuffer(sources, dtype=np.int32), np.frombuffer(targets, dtype=np.int32)
+
+def _web_edges(lines, intern):
+    # Lines a/b/c/..., where a links to b, c, ...
+    ids = intern("/".join(lines).split("/"))
+    counts = np.array([line.count("/") for line in lines], dtype=np.intp)
+    # Index of the first label of each line, the webpage linking
+    first = np.cumsum(counts + 1) - counts - 1
+    linked = np.ones(len(ids), dtype=bool)
+    linked[first] = False
+    return np.repeat(ids[first], counts), ids[linked]
+
+def _uefa_edges(lines, intern):
+    # Lines A,B,a,b of a game of A against B, where the loser links to the winner
+    losers, winners = [], []
+    for line in lines:
+        home_team, away_team, home_goals, away_goals = line.split(',')
+        # Home team lost
+        if home_goals < away_goals:
+            losers.append(home_team)
+            winners.append(away_team)
+        # **Symmetric to above ^**
+        elif home_goals > away_goals:
+            losers.append(away_team)
+            winners.append(home_team)
+    return intern(losers), intern(winners)
+
+def _do_calc(labels, sources, targets, epsilon):
+    n = len(labels)
+
+    # Making the adjacency matrix, where duplicate edges are summed
+    if sp is not None:
+        adj = sp.coo_matrix((np.ones(len(sources)), (targets, sources)), shape=(n, n)).tocsr()
+    else:
+        adj = np.zeros((n, n))
+        np.add.at(adj, (targets, sources), 1)
 
     # Calculate ranking and return 
-    g = DiGraph(adj, allID)
+    g = DiGraph(adj, labels)
     return get_ranks(g.itersolve(epsilon=epsilon))
 
 